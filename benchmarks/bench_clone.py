@@ -0,0 +1,99 @@
+"""Compares Board.clone() and the clone-based with_moves() against the deepcopy path,
+and both against BitBoard.
+
+Run from the root of the repository with `python benchmarks/bench_clone.py`.
+"""
+
+import copy
+import os
+import random
+import sys
+import timeit
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "submission")
+)
+
+from tetris.bitboard import BitBoard
+from tetris.board import Action, Board
+from tetris.pieces import PIECES
+
+ACTIONS = [
+    Action.ROTATE_CLOCKWISE,
+    Action.MOVE_LEFT,
+    Action.MOVE_LEFT,
+    Action.HARD_DROP,
+]
+
+
+def mid_game_board(seed: int = 0, pieces: int = 12) -> Board:
+    """Drops a number of pieces into random columns to get a realistic stack."""
+
+    rng = random.Random(seed)
+    board = Board()
+
+    for _ in range(pieces):
+        board.set_piece(PIECES[rng.randrange(7)]())
+        board.spawn_piece()
+        shift = rng.choice([Action.MOVE_LEFT, Action.MOVE_RIGHT])
+        for _ in range(rng.randrange(5)):
+            board.apply_action(shift)
+        board.apply_action(Action.HARD_DROP)
+        board.clear_lines(board.find_lines_to_clear())
+
+    board.set_piece(PIECES[rng.randrange(7)]())
+    board.spawn_piece()
+
+    return board
+
+
+def deepcopy_with_moves(board: Board) -> Board:
+    """The previous with_moves() implementation."""
+
+    board = copy.deepcopy(board)
+
+    for action in ACTIONS:
+        board.apply_action(action)
+
+        if board.piece and board.piece.landed:
+            break
+
+    return board
+
+
+def bench(label: str, fn, number: int) -> float:
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"{label:<42} {seconds * 1e6:9.2f} us")
+    return seconds
+
+
+def push_pop(board: Board) -> None:
+    board.push_actions(ACTIONS)
+    board.pop()
+
+
+def main() -> None:
+    board = mid_game_board()
+    bitboard = BitBoard.from_board(board)
+    shape = BitBoard.from_board(board, track_colours=False)
+
+    deep = bench("copy.deepcopy(board)", lambda: copy.deepcopy(board), 2000)
+    clone = bench("board.clone()", board.clone, 2000)
+    bench("bitboard.clone()", bitboard.clone, 2000)
+    shape_clone = bench("bitboard.clone() (no colours)", shape.clone, 2000)
+    print(f"clone speedup: {deep / clone:.1f}x")
+    print(f"bitboard (no colours) clone speedup: {clone / shape_clone:.1f}x\n")
+
+    old = bench("with_moves (deepcopy)", lambda: deepcopy_with_moves(board), 1000)
+    new = bench("with_moves (clone)", lambda: board.with_moves(ACTIONS), 1000)
+    bench("bitboard.with_moves (clone)", lambda: bitboard.with_moves(ACTIONS), 1000)
+    bench("bitboard.with_moves (no colours)", lambda: shape.with_moves(ACTIONS), 1000)
+    print(f"with_moves speedup: {old / new:.1f}x\n")
+
+    bench("push_actions + pop", lambda: push_pop(board), 1000)
+    bench("bitboard push_actions + pop", lambda: push_pop(bitboard), 1000)
+    bench("bitboard push_actions + pop (no colours)", lambda: push_pop(shape), 1000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+"""Microbenchmarks for the hot paths of the Tetris engine.
+
+Each operation is run on recorded mid-game stacks (benchmarks/states.json) with
+every piece type in every orientation, and reported in nanoseconds and bytes
+allocated per call. Each timing is also divided by that of a fixed calibration
+loop timed alternately with it, and those ratios are compared against
+benchmarks/baseline.json, so that the baseline holds on other machines. Any
+operation that has slowed down by more than the threshold is flagged.
+
+Run from the root of the repository with `python benchmarks/bench_engine.py`.
+Use `--save-baseline` after an intentional change to record new numbers, and
+`--record` to regenerate the board states. `--reference REVISION` also runs the
+benchmarks on another git revision of the engine in the same run and shows how
+much faster each operation has become since; saved along with the baseline, it
+is shown on every later run.
+"""
+
+import copy
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Iterator, Optional
+
+import click
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(DIRECTORY)
+STATES_PATH = os.path.join(DIRECTORY, "states.json")
+BASELINE_PATH = os.path.join(DIRECTORY, "baseline.json")
+
+# Set to another checkout's submission directory to benchmark that engine instead,
+# as done for --reference
+SUBMISSION_ENVIRONMENT_VARIABLE = "BENCH_SUBMISSION"
+
+sys.path.insert(
+    0,
+    os.environ.get(SUBMISSION_ENVIRONMENT_VARIABLE) or os.path.join(ROOT, "submission"),
+)
+
+from tetris.board import Action, Board
+from tetris.constants import BOARD_HEIGHT, BOARD_WIDTH
+from tetris.pieces import PIECES
+from tetris.piece import Piece
+
+EMPTY = "."
+
+WITH_MOVES_ACTIONS = [
+    Action.ROTATE_CLOCKWISE,
+    Action.MOVE_LEFT,
+    Action.MOVE_LEFT,
+    Action.HARD_DROP,
+]
+
+# The board scanned by the calibration loop
+CALIBRATION_GRID = [
+    [None if (x + y) % 3 else "G" for x in range(BOARD_WIDTH)]
+    for y in range(BOARD_HEIGHT)
+]
+
+
+def calibration() -> int:
+    """A fixed workload of the kind the engine does (indexing lists of lists in
+    Python), which every timing is divided by. Machines and interpreters differ
+    much less in the ratios than in the raw timings."""
+
+    filled = 0
+    for row in CALIBRATION_GRID:
+        for cell in row:
+            if cell is not None:
+                filled += 1
+
+    return filled
+
+
+def clone(board: Board) -> Board:
+    # Engines from before Board.clone() was added are copied the way they used to be
+    return board.clone() if hasattr(board, "clone") else copy.deepcopy(board)
+
+
+def encode(board: Board) -> list[str]:
+    return ["".join(cell or EMPTY for cell in row) for row in board.board]
+
+
+def decode(rows: list[str]) -> Board:
+    board = Board()
+    board.board = [[None if cell == EMPTY else cell for cell in row] for row in rows]
+    if hasattr(board, "recompute_heights"):
+        board.recompute_heights()
+
+    return board
+
+
+def record_states(games: int = 6, every: int = 15) -> dict[str, list[list[str]]]:
+    """Plays seeded games, placing each piece in its lowest reachable position, and
+    keeps every few stacks as well as every stack just before lines are cleared.
+
+    Args:
+        games (int, optional): The number of games to play. Defaults to 6.
+        every (int, optional): How many pieces to place between recorded stacks. Defaults to 15.
+
+    Returns:
+        dict[str, list[list[str]]]: The encoded "stacks" and "clears" boards.
+    """
+
+    rng = random.Random(0)
+    stacks: list[list[str]] = []
+    clears: list[list[str]] = []
+
+    for _ in range(games):
+        board = Board()
+
+        for placed in range(200):
+            board.set_piece(PIECES[rng.randrange(len(PIECES))]())
+            if not board.spawn_piece():
+                break
+
+            placements = board.enumerate_placements()
+            best = max(placements, key=lambda p: (p.y, rng.random()))
+            for action in best.actions:
+                board.apply_action(action)
+
+            if lines := board.find_lines_to_clear():
+                clears.append(encode(board))
+                board.clear_lines(lines)
+            elif placed % every == every - 1:
+                stacks.append(encode(board))
+
+            if not board.is_game_running():
+                break
+
+    return {"stacks": stacks, "clears": clears}
+
+
+def positions(stacks: list[Board]) -> Iterator[Board]:
+    """Spawns every piece type on each of the stacks, turns it into each of its
+    orientations and lets it fall two rows, skipping pieces that cannot spawn or
+    have landed. Only moves that every revision of the engine has are used, so
+    that --reference benchmarks the same positions.
+
+    Yields:
+        Iterator[Board]: A board with a piece in play.
+    """
+
+    for stack in stacks:
+        seen = set()
+
+        for piece_type in PIECES:
+            for turns in range(4):
+                board = clone(stack)
+                board.set_piece(piece_type())
+                if not board.spawn_piece():
+                    break
+
+                for _ in range(turns):
+                    board.rotate_piece_clockwise()
+                board.fall()
+                board.fall()
+
+                piece = board.piece
+                key = (piece_type, piece.orientation, piece.y, piece.x)
+                if piece.landed or key in seen:
+                    continue
+
+                seen.add(key)
+                yield board
+
+
+def time_calls(calls: list[Callable[[], object]]) -> float:
+    start = time.perf_counter_ns()
+    for call in calls:
+        call()
+
+    return (time.perf_counter_ns() - start) / len(calls)
+
+
+def measure(
+    make: Callable[[], list[Callable[[], object]]], repeat: int
+) -> tuple[float, float, float]:
+    """Times calls, alternating with the calibration loop, and measures the memory
+    they allocate.
+
+    Args:
+        make (Callable[[], list[Callable[[], object]]]): Creates a fresh list of calls, one per recorded state.
+        repeat (int): How many times to run every call, taking the fastest.
+
+    Returns:
+        tuple[float, float, float]: Nanoseconds per call, nanoseconds per calibration loop and bytes allocated per call.
+    """
+
+    best = best_calibration = float("inf")
+    for run in range(repeat + 1):
+        calls = make()
+        elapsed = time_calls(calls)
+
+        # Timing the calibration loop straight after the calls means both see the
+        # machine in the same state, which a single calibration at the start would not
+        calibration_elapsed = time_calls([calibration] * len(calls))
+
+        # The first run only warms up
+        if run:
+            best = min(best, elapsed)
+            best_calibration = min(best_calibration, calibration_elapsed)
+
+    calls = make()
+    allocated = 0
+    tracemalloc.start()
+    for call in calls:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = call()
+        allocated += tracemalloc.get_traced_memory()[1] - before
+        del result
+    tracemalloc.stop()
+
+    return best, best_calibration, allocated / len(calls)
+
+
+def benchmarks(
+    boards: list[Board], clears: list[Board]
+) -> dict[str, Callable[[], list[Callable[[], object]]]]:
+    """Builds the benchmarked operations. Each creates fresh copies of the states it
+    mutates, so that every call starts from the recorded state."""
+
+    def board_calls(method: Callable[[Board], object], states: list[Board]):
+        return lambda: [(lambda board=clone(board): method(board)) for board in states]
+
+    def piece_calls(method: Callable[[Piece, Board], object]):
+        return lambda: [
+            (lambda board=board, piece=copy.copy(board.piece): method(piece, board))
+            for board in boards
+        ]
+
+    cases: dict[str, Callable[[], list[Callable[[], object]]]] = {}
+
+    for action in Action:
+        cases[f"Board.apply_action({action.name})"] = board_calls(
+            lambda board, action=action: board.apply_action(action), boards
+        )
+
+    cases["Board.with_moves"] = lambda: [
+        (lambda board=board: board.with_moves(WITH_MOVES_ACTIONS)) for board in boards
+    ]
+    # The same moves undone in place rather than applied to a clone, so the two can
+    # be compared directly
+    cases["Board.push_actions+pop"] = lambda: [
+        (lambda board=board: (board.push_actions(WITH_MOVES_ACTIONS), board.pop()))
+        for board in boards
+    ]
+    cases["Board.clone+apply_action(MOVE_LEFT)"] = lambda: [
+        (lambda board=board: clone(board).apply_action(Action.MOVE_LEFT))
+        for board in boards
+    ]
+    cases["Board.push_actions+pop(MOVE_LEFT)"] = lambda: [
+        (lambda board=board: (board.push_actions([Action.MOVE_LEFT]), board.pop()))
+        for board in boards
+    ]
+    cases["Board.copy"] = lambda: [board.copy for board in boards]
+    cases["Board.clone"] = lambda: [board.clone for board in boards]
+
+    previous = [board.with_move(Action.NOOP).copy() for board in boards]
+    cases["Board.get_changes"] = lambda: [
+        (lambda board=board, old=old: board.get_changes(old))
+        for board, old in zip(boards, previous)
+    ]
+    cases["Board.find_lines_to_clear"] = lambda: [
+        board.find_lines_to_clear for board in clears
+    ]
+    cases["Board.clear_lines"] = board_calls(
+        lambda board: board.clear_lines(board.find_lines_to_clear()), clears
+    )
+
+    cases["Piece.move_left"] = piece_calls(lambda p, b: p.move_left(b.board))
+    cases["Piece.move_right"] = piece_calls(lambda p, b: p.move_right(b.board))
+    cases["Piece.rotate_clockwise"] = piece_calls(
+        lambda p, b: p.rotate_clockwise(b.board)
+    )
+    cases["Piece.rotate_anticlockwise"] = piece_calls(
+        lambda p, b: p.rotate_anticlockwise(b.board)
+    )
+    cases["Piece.has_landed"] = piece_calls(lambda p, b: p.has_landed(b.board))
+    cases["Piece.drop_distance"] = piece_calls(
+        lambda p, b: p.drop_distance(p.orientation, p.y, p.x, b.heights)
+    )
+    cases["Piece.fall"] = piece_calls(lambda p, b: p.fall())
+
+    return cases
+
+
+def run(repeat: int, only: Optional[str]) -> dict[str, Any]:
+    """Runs the benchmarks on the engine that was imported.
+
+    Args:
+        repeat (int): How many times to run every call, taking the fastest.
+        only (Optional[str]): Only runs operations containing this text.
+
+    Returns:
+        dict[str, Any]: The "calibration_ns", the number of "positions" and the "operations", each with its "ns", "bytes" and "relative" timing. Operations the engine does not have are left out.
+    """
+
+    with open(STATES_PATH) as f:
+        states = json.load(f)
+
+    boards = list(positions([decode(rows) for rows in states["stacks"]]))
+    clears = [decode(rows) for rows in states["clears"]]
+
+    measured: dict[str, tuple[float, float, float]] = {}
+
+    for name, make in benchmarks(boards, clears).items():
+        if only and only not in name:
+            continue
+
+        try:
+            measured[name] = measure(make, repeat)
+        except AttributeError:
+            # Older revisions of the engine do not have every operation
+            continue
+
+    return {
+        "calibration_ns": round(min(c for _, c, _ in measured.values()), 1),
+        "positions": len(boards),
+        "operations": {
+            name: {
+                "ns": round(ns, 1),
+                "bytes": round(allocated, 1),
+                "relative": round(ns / calibration_ns, 3),
+            }
+            for name, (ns, calibration_ns, allocated) in measured.items()
+        },
+    }
+
+
+def run_revision(revision: str, repeat: int, only: Optional[str]) -> dict[str, Any]:
+    """Runs the benchmarks on the engine at another git revision, in a new process
+    with that revision's submission directory on the path.
+
+    Args:
+        revision (str): The git revision.
+        repeat (int): How many times to run every call, taking the fastest.
+        only (Optional[str]): Only runs operations containing this text.
+
+    Returns:
+        dict[str, Any]: The results as returned by run(), and the "revision".
+    """
+
+    commit = subprocess.run(
+        ["git", "rev-parse", "--short", revision],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", commit, "submission"],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+    ).stdout
+
+    with tempfile.TemporaryDirectory() as directory:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(directory)
+
+        output = os.path.join(directory, "results.json")
+        arguments = ["--repeat", str(repeat), "--output", output]
+        if only:
+            arguments += ["--filter", only]
+
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *arguments],
+            env={
+                **os.environ,
+                SUBMISSION_ENVIRONMENT_VARIABLE: os.path.join(directory, "submission"),
+            },
+            check=True,
+        )
+
+        with open(output) as f:
+            return {"revision": commit, **json.load(f)}
+
+
+@click.command()
+@click.option(
+    "--repeat",
+    default=30,
+    help="The number of times to run each operation, keeping the fastest.",
+)
+@click.option(
+    "--threshold",
+    default=0.25,
+    help="The fractional slowdown over the baseline at which to flag an operation.",
+)
+@click.option("--filter", "only", help="Only runs operations containing this text.")
+@click.option(
+    "--record",
+    is_flag=True,
+    help="Plays new games to regenerate the board states first.",
+)
+@click.option(
+    "--save-baseline",
+    is_flag=True,
+    help="Saves the results as the new baseline instead of comparing.",
+)
+@click.option(
+    "--reference",
+    help="A git revision to benchmark as well, e.g. from before an optimisation.",
+)
+@click.option("--output", hidden=True, help="Writes the results as JSON and exits.")
+def main(
+    repeat: int,
+    threshold: float,
+    only: Optional[str],
+    record: bool,
+    save_baseline: bool,
+    reference: Optional[str],
+    output: Optional[str],
+) -> None:
+    """Microbenchmarks the hot paths of the Tetris engine."""
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(run(repeat, only), f)
+        return
+
+    if record:
+        with open(STATES_PATH, "w") as f:
+            json.dump(record_states(), f, indent=1)
+
+    baseline: dict[str, Any] = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    if reference:
+        print(f"Benchmarking {reference} for reference...")
+        references = run_revision(reference, repeat, only)
+    else:
+        references = baseline.get("reference", {})
+
+    print("Benchmarking the working tree...")
+    results = run(repeat, only)
+
+    previous_results: dict[str, dict[str, float]] = (
+        {} if save_baseline else baseline.get("operations", {})
+    )
+    reference_results: dict[str, dict[str, float]] = references.get("operations", {})
+    regressions = []
+
+    print(
+        f"\n{results['positions']} piece positions, calibration loop "
+        f"{results['calibration_ns']:.0f} ns\n"
+    )
+    if references and references["positions"] != results["positions"]:
+        print(
+            f"{references['revision']} benchmarked {references['positions']} piece "
+            "positions, so its timings are not directly comparable\n"
+        )
+    print(
+        f"{'operation':<42} {'ns/op':>10} {'bytes/op':>10} {'x calib':>8} "
+        f"{'baseline':>10} {'vs ' + references.get('revision', 'ref'):>12}"
+    )
+
+    for name, result in results["operations"].items():
+        comparison = ""
+        previous = previous_results.get(name)
+        if previous:
+            change = result["relative"] / previous["relative"] - 1
+            comparison = f"{change:+.0%}"
+
+            if change > threshold:
+                regressions.append(name)
+                comparison += " REGRESSION"
+
+        speedup = ""
+        if name in reference_results:
+            speedup = f"{reference_results[name]['relative'] / result['relative']:.1f}x"
+
+        print(
+            f"{name:<42} {result['ns']:>10.0f} {result['bytes']:>10.0f} "
+            f"{result['relative']:>8.2f} {comparison:>10} {speedup:>12}"
+        )
+
+    if save_baseline:
+        if references:
+            results["reference"] = references
+
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+    elif regressions:
+        print(
+            f"\n{len(regressions)} operation(s) slower than baseline by >{threshold:.0%}"
+            f" relative to the calibration: {', '.join(regressions)}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
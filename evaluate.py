@@ -0,0 +1,155 @@
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Sequence, Tuple, Union
+
+import click
+
+sys.path.append(os.path.dirname(os.path.abspath("submission/tetris")))
+
+from tetris import Action, Board
+from tetris.constants import MOVE_TIME
+from tetris.sim import SimResult, simulate, sync_agent
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Computes a percentile of the values, interpolating between the closest ranks.
+
+    Args:
+        values (Sequence[float]): The values, which need not be sorted.
+        q (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile, or 0 if there are no values.
+    """
+
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarise(values: Sequence[float]) -> dict[str, float]:
+    """Summarises the distribution of the values.
+
+    Args:
+        values (Sequence[float]): The values.
+
+    Returns:
+        dict[str, float]: The mean, median, 5th and 95th percentiles and maximum.
+    """
+
+    return {
+        "mean": statistics.fmean(values) if values else 0.0,
+        "median": percentile(values, 50),
+        "p5": percentile(values, 5),
+        "p95": percentile(values, 95),
+        "max": max(values, default=0.0),
+    }
+
+
+def play_game(seed: int, move_time: float) -> Tuple[SimResult, list[float]]:
+    """Plays a seeded game with a fresh instance of the selected agent.
+
+    Args:
+        seed (int): The seed of the game.
+        move_time (float): The time budget for each move, in seconds.
+
+    Returns:
+        Tuple[SimResult, list[float]]: The result of the game and the time in seconds the agent took for each move.
+    """
+
+    from submission.agent import SelectedAgent  # your agent
+
+    selected = SelectedAgent()
+    selected.setup()
+
+    agent = sync_agent(selected, move_time)
+    latencies: list[float] = []
+
+    def play_move(board: Board) -> Union[Action, Sequence[Action]]:
+        start = time.perf_counter()
+        actions = agent(board)
+        latencies.append(time.perf_counter() - start)
+
+        return actions
+
+    try:
+        return simulate(play_move, seed), latencies
+    finally:
+        selected.teardown()
+
+
+@click.command()
+@click.option("--start", default=0, help="The first seed to play.")
+@click.option("--games", default=100, help="The number of seeds to play.")
+@click.option(
+    "--workers",
+    default=os.cpu_count() or 1,
+    help="The number of worker processes.",
+)
+@click.option(
+    "--move-time",
+    default=MOVE_TIME,
+    help="The time budget for each move, in seconds.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Writes the full results to this JSON file.",
+)
+def main(
+    start: int, games: int, workers: int, move_time: float, output: str | None
+) -> None:
+    """Evaluates the agent in submission/agent.py over a range of seeded games."""
+
+    seeds = range(start, start + games)
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(
+            executor.map(partial(play_game, move_time=move_time), seeds, chunksize=4)
+        )
+
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency * 1000 for _, game in results for latency in game]
+    report: dict[str, Any] = {
+        "seeds": [start, start + games - 1],
+        "games": games,
+        "seconds": elapsed,
+        "score": summarise([result.score for result, _ in results]),
+        "lines": summarise([result.lines for result, _ in results]),
+        "pieces": summarise([result.pieces for result, _ in results]),
+        "latency_ms": summarise(latencies),
+        "results": [
+            {**result._asdict(), "moves": len(game)} for result, game in results
+        ],
+    }
+
+    for name in ("score", "lines", "pieces", "latency_ms"):
+        stats = report[name]
+        click.echo(
+            click.style(f"{name:>10}", bold=True)
+            + ": "
+            + "  ".join(f"{key} {value:.3f}" for key, value in stats.items())
+        )
+
+    click.echo(f"\nPlayed {games} games in {elapsed:.1f}s on {workers} workers.")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
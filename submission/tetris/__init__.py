@@ -1,19 +1,139 @@
 import asyncio
 import os
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple, Union
 
-from tetris.agent import BaseAgent
+from tetris import metrics
+from tetris.agent import AnytimeAgent, BaseAgent
+from tetris.bitboard import BitBoard
 from tetris.board import Action, Board
+from tetris.constants import MOVE_TIME
+from tetris.piece import Piece
 from tetris.pieces import PIECE_MAPPINGS
+from tetris.zobrist import CELL_KEYS
+
+# Imported last so that it can instrument the board classes above if TETRIS_PROFILE is set
+from tetris import profiling
+
+# Replies for a single action, and the encoding of each action in a sequence
+ACTION_REPLIES: Dict[Action, bytes] = {action: b"%d\n" % action for action in Action}
+ACTION_BYTES: Dict[Action, bytes] = {action: b"%d" % action for action in Action}
+
+# Cell values of each piece type in U messages
+CELL_VALUES: Dict[bytes, str | None] = {
+    b"N": None,
+    **{piece_type.encode(): piece_type for piece_type in PIECE_MAPPINGS},
+}
 
 
 class GameRunner:
-    def __init__(self, agent: BaseAgent, seed: int = -1) -> None:
+    def __init__(
+        self, agent: BaseAgent, seed: int = -1, move_time: float = MOVE_TIME
+    ) -> None:
         self.seed = seed
+        self.move_time = move_time
         self.score = 0
         self.running = True
         self.agent = agent
         self.board = Board()
 
+        # One piece per type, reused whenever that type is in play
+        self.pieces: Dict[bytes, Piece] = {
+            piece_type.encode(): piece() for piece_type, piece in PIECE_MAPPINGS.items()
+        }
+
+        # The thread running the agent's speculative work, if any, and its cancel flag
+        self.speculation: Optional[Tuple[threading.Thread, threading.Event]] = None
+
+    def update(self, message: list[bytes]) -> None:
+        """Applies a U message to the board.
+
+        Args:
+            message (list[bytes]): The fields of the message: U, the piece type, its x,
+            y and orientation, then any number of piece_type,y,x cell updates.
+        """
+
+        board = self.board
+        piece = self.pieces[message[1]]
+        if board.piece is not piece:
+            piece.landed = False
+            board.piece = piece
+
+        piece.x = int(message[2])
+        piece.y = int(message[3])
+        piece.orientation = int(message[4])
+
+        cells = board.board
+        hashes = board.hashes
+
+        for update in message[5:]:
+            piece_type, y_bytes, x_bytes = update.split(b",")
+            y, x = int(y_bytes), int(x_bytes)
+            value = CELL_VALUES[piece_type]
+
+            # Keep the Zobrist hashes up to date without rehashing the whole board
+            if previous := cells[y][x]:
+                hashes ^= CELL_KEYS[previous][y][x]
+            if value:
+                hashes ^= CELL_KEYS[value][y][x]
+
+            cells[y][x] = value
+
+        board.hashes = hashes
+        board.recompute_heights()
+
+    def reply(self, actions: Union[Action, Sequence[Action]]) -> bytes:
+        """Encodes the agent's move as a reply to DOXA.
+
+        Args:
+            actions (Union[Action, Sequence[Action]]): The action(s) returned by the agent.
+
+        Returns:
+            bytes: The space-separated action values followed by a newline.
+        """
+
+        if isinstance(actions, Action):
+            return ACTION_REPLIES[actions]
+        elif actions:
+            return b" ".join(map(ACTION_BYTES.__getitem__, actions)) + b"\n"
+
+        return ACTION_REPLIES[Action.NOOP]
+
+    def speculate(self, actions: Union[Action, Sequence[Action]]) -> None:
+        """Starts the agent's speculative work on the board the move is expected to produce.
+
+        Does nothing if the agent does not override BaseAgent.speculate().
+
+        Args:
+            actions (Union[Action, Sequence[Action]]): The action(s) that were just sent.
+        """
+
+        if type(self.agent).speculate is BaseAgent.speculate:
+            return
+
+        if isinstance(actions, Action):
+            actions = [actions]
+
+        board = self.board.with_moves(actions or [Action.NOOP])
+        cancelled = threading.Event()
+        thread = threading.Thread(
+            target=self.agent.speculate, args=(board, cancelled), daemon=True
+        )
+        thread.start()
+
+        self.speculation = thread, cancelled
+
+    def cancel_speculation(self) -> None:
+        """Stops the agent's speculative work and waits for it to finish."""
+
+        if self.speculation:
+            thread, cancelled = self.speculation
+            cancelled.set()
+            thread.join()
+
+            self.speculation = None
+
     async def run(self) -> None:
         """Communicates with DOXA to run a Tetris game.
 
@@ -23,53 +143,90 @@ class GameRunner:
 
         stream_directory = os.environ.get("DOXA_STREAMS")
         with (
-            open(f"{stream_directory}/in", "r") as r,
-            open(f"{stream_directory}/out", "w") as w,
+            open(f"{stream_directory}/in", "rb") as r,
+            open(f"{stream_directory}/out", "wb") as w,
         ):
-            assert r.readline().strip() == "INIT"
-            w.write("OK\n")
-            w.flush()
-
-            while True:
-                message = r.readline().strip().split(" ")
-
-                if not message:
-                    continue
-                elif message[0] == "M":
-                    actions = await self.agent.play_move(self.board)
-                    if isinstance(actions, Action):
-                        assert actions in Action
-                        w.write(f"{actions.value}\n")
-                        w.flush()
-                    elif actions:
-                        w.write(
-                            " ".join([str(action.value) for action in actions]) + "\n"
+            assert r.readline().strip() == b"INIT"
+            self.agent.setup()
+
+            try:
+                w.write(b"OK\n")
+                w.flush()
+
+                # Latency histograms are only recorded if enabled through TETRIS_METRICS
+                timed = metrics.ENABLED
+
+                while True:
+                    if timed:
+                        waiting = time.perf_counter_ns()
+
+                    line = r.readline()
+                    received = time.perf_counter_ns()
+
+                    if timed:
+                        metrics.record("runner.wait", received - waiting)
+
+                    self.cancel_speculation()
+
+                    if not line:
+                        return
+
+                    started = time.perf_counter_ns()
+                    message = line.split()
+
+                    if not message:
+                        continue
+                    elif message[0] == b"M":
+                        if timed:
+                            metrics.record(
+                                "runner.parse.M", time.perf_counter_ns() - started
+                            )
+
+                        actions = await self.agent.play_move_with_deadline(
+                            self.board, received / 1e9 + self.move_time
                         )
+
+                        if timed:
+                            decided = time.perf_counter_ns()
+                            metrics.record("runner.agent", decided - started)
+
+                        reply = self.reply(actions)
+
+                        if timed:
+                            encoded = time.perf_counter_ns()
+                            metrics.record("runner.reply", encoded - decided)
+
+                        w.write(reply)
                         w.flush()
+
+                        if timed:
+                            written = time.perf_counter_ns()
+                            metrics.record("runner.write", written - encoded)
+                            metrics.record("runner.move", written - received)
+
+                        self.speculate(actions)
+                    elif message[0] == b"L":
+                        self.score = int(message[1])
+                        self.board.clear_lines([int(line) for line in message[2:]])
+
+                        if timed:
+                            metrics.record(
+                                "runner.parse.L", time.perf_counter_ns() - started
+                            )
+                    elif message[0] == b"U":
+                        self.update(message)
+
+                        if timed:
+                            metrics.record(
+                                "runner.parse.U", time.perf_counter_ns() - started
+                            )
                     else:
-                        w.write(f"{Action.NOOP.value}\n")
-                        w.flush()
-                elif message[0] == "L":
-                    self.score = int(message[1])
-                    self.board.clear_lines([int(line) for line in message[2:]])
-                elif message[0] == "U":
-                    if (
-                        not self.board.piece
-                        or self.board.piece.piece_type != message[1]
-                    ):
-                        self.board.piece = PIECE_MAPPINGS[message[1]]()  # type: ignore
-
-                    self.board.piece.x = int(message[2])
-                    self.board.piece.y = int(message[3])
-                    self.board.piece.orientation = int(message[4])
-
-                    for update in message[5:]:
-                        piece_type, y, x = update.split(",")
-                        self.board.board[int(y)][int(x)] = (
-                            None if piece_type == "N" else piece_type
+                        raise ValueError(
+                            f"Unknown message type: {message[0].decode()}."
                         )
-                else:
-                    raise ValueError(f"Unknown message type: {message[0]}.")
+            finally:
+                self.cancel_speculation()
+                self.agent.teardown()
 
 
 def main(agent: BaseAgent):
@@ -1,8 +1,146 @@
-from typing import Sequence, Union
+import time
+from threading import Event
+from typing import Optional, Sequence, Union
 
 from tetris.board import Action, Board
+from tetris.constants import MOVE_TIME
 
 
 class BaseAgent:
+    def setup(self) -> None:
+        """Prepares the agent before the game starts.
+
+        Called once by the game runners before the first move (on INIT, when playing on
+        DOXA), outside of any move's time budget. Use it to start worker processes or
+        build tables. Overriding this method is optional; by default it does nothing.
+        """
+
+    def teardown(self) -> None:
+        """Releases anything setup() acquired once the game is over.
+
+        Called once by the game runners after the last move, even if the game ended
+        with an error. Use it to stop worker processes started in setup(). Overriding
+        this method is optional; by default it does nothing.
+        """
+
     async def play_move(self, board: Board) -> Union[Action, Sequence[Action]]:
         raise NotImplementedError
+
+    async def play_move_with_deadline(
+        self, board: Board, deadline: float
+    ) -> Union[Action, Sequence[Action]]:
+        """Makes a move, returning before the deadline.
+
+        This is what the game runners call. By default it ignores the deadline and
+        calls play_move(); agents that can trade quality for time should override it.
+
+        Args:
+            board (Board): The Tetris board.
+            deadline (float): The time.perf_counter() value by which to return.
+
+        Returns:
+            Union[Action, Sequence[Action]]: The action(s) to perform.
+        """
+
+        return await self.play_move(board)
+
+    def speculate(self, board: Board, cancelled: Event) -> None:
+        """Does work ahead of the next move while waiting for DOXA to respond.
+
+        Called by GameRunner in a background thread after each move has been sent, with
+        a copy of the board as it will be once the move has been played (so a piece
+        that was hard dropped will have landed). Use it to warm caches or search the
+        likely next state so that play_move() can reuse the results.
+
+        The work is cancelled as soon as the next message arrives, so implementations
+        should check cancelled.is_set() regularly and return promptly once it is.
+        Overriding this method is optional; by default the runner does nothing.
+
+        Args:
+            board (Board): The predicted board after the move that was just sent.
+            cancelled (Event): Set when the real update arrives.
+        """
+
+
+class SearchTimeout(Exception):
+    """Raised by AnytimeAgent.check_time() to abandon a search that has run out of time."""
+
+
+class AnytimeAgent(BaseAgent):
+    """An agent that searches deeper and deeper until its time runs out.
+
+    Subclasses implement search(board, depth), which returns the best move found when
+    searching to the given depth (or None if there is nothing to play). Depths 1, 2, ...
+    are searched in turn and the result of the deepest completed search is played. Long
+    searches should call check_time() regularly, which abandons the current depth once
+    the deadline is near. If not even the first depth completes, the piece is dropped.
+    """
+
+    # Stop this long before the deadline to leave time to send the move, in seconds
+    safety_margin: float = 0.005
+    max_depth: int = 16
+
+    deadline: float = float("inf")
+
+    def search(
+        self, board: Board, depth: int
+    ) -> Optional[Union[Action, Sequence[Action]]]:
+        raise NotImplementedError
+
+    def fallback(self, board: Board) -> Union[Action, Sequence[Action]]:
+        """Gets the move to make when no search completes in time.
+
+        Args:
+            board (Board): The Tetris board.
+
+        Returns:
+            Union[Action, Sequence[Action]]: A hard drop, which always ends the turn.
+        """
+
+        return [Action.HARD_DROP]
+
+    def time_left(self) -> float:
+        """Gets the time left for the current move, excluding the safety margin.
+
+        Returns:
+            float: The number of seconds left, which is negative once time is up.
+        """
+
+        return self.deadline - self.safety_margin - time.perf_counter()
+
+    def check_time(self) -> None:
+        """Abandons the current search if the time for this move is up.
+
+        Raises:
+            SearchTimeout: The deadline (less the safety margin) has passed.
+        """
+
+        if time.perf_counter() >= self.deadline - self.safety_margin:
+            raise SearchTimeout
+
+    async def play_move(self, board: Board) -> Union[Action, Sequence[Action]]:
+        return await self.play_move_with_deadline(
+            board, time.perf_counter() + MOVE_TIME
+        )
+
+    async def play_move_with_deadline(
+        self, board: Board, deadline: float
+    ) -> Union[Action, Sequence[Action]]:
+        self.deadline = deadline
+        best = None
+
+        for depth in range(1, self.max_depth + 1):
+            if self.time_left() <= 0:
+                break
+
+            try:
+                result = self.search(board, depth)
+            except SearchTimeout:
+                break
+
+            if result is None:
+                break
+
+            best = result
+
+        return best if best is not None else self.fallback(board)
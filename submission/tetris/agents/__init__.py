@@ -0,0 +1,4 @@
+from tetris.agents.beam import BeamSearchAgent
+from tetris.agents.expectimax import ExpectimaxAgent
+from tetris.agents.heuristic import DEFAULT_WEIGHTS, Weights
+from tetris.agents.mcts import MCTSAgent
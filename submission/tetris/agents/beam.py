@@ -0,0 +1,234 @@
+import time
+from typing import Optional, Sequence, Tuple, Type, Union
+
+from tetris.agent import BaseAgent
+from tetris.agents.heuristic import (
+    DEFAULT_WEIGHTS,
+    LOSS,
+    Weights,
+    drop_values,
+    evaluate,
+    surface,
+)
+from tetris.board import Action, Board
+from tetris.constants import Cell
+from tetris.parallel import ParallelSearch
+from tetris.piece import Piece
+from tetris.pieces import PIECES
+from tetris.search import board_rows, can_spawn, find_placements, place
+
+
+class BeamSearchAgent(BaseAgent):
+    """An agent that places each piece where a heuristic judges the board best, looking
+    ahead at the pieces that could come next.
+
+    Every placement of the current piece is found with find_placements() and scored by
+    the heuristic. The best beam_width of them are then searched further: at each of
+    the following plies, every type of piece is dropped in each orientation and column
+    (scored with drop_values(), which only builds boards where lines are cleared), the
+    best beam_width results for each type are expanded again, and the value of a
+    board is the average over piece types of the best value reachable. The whole
+    sequence of actions to reach the chosen placement is returned.
+
+    With the defaults, a move takes around 10 milliseconds (well inside MOVE_TIME), so
+    a 1000-piece game takes about 15 seconds on a single CPU. Looking ahead stops early
+    if the deadline passes.
+    """
+
+    def __init__(
+        self,
+        weights: Weights = DEFAULT_WEIGHTS,
+        beam_width: int = 3,
+        depth: int = 2,
+        workers: int = 0,
+    ) -> None:
+        """
+        Args:
+            weights (Weights, optional): The heuristic weights. Defaults to DEFAULT_WEIGHTS.
+            beam_width (int, optional): The number of placements of each piece to search further. Defaults to 3.
+            depth (int, optional): The number of pieces to place, including the current one. Defaults to 2.
+            workers (int, optional): The number of worker processes to look ahead from the
+                current piece's placements in parallel. Defaults to 0 (no workers).
+        """
+
+        self.weights = weights
+        self.beam_width = beam_width
+        self.depth = depth
+
+        # Looks ahead from several placements at once when there are workers
+        self.parallel: Optional[ParallelSearch] = None
+        if workers:
+            self.parallel = ParallelSearch(self.evaluate_placement, workers)
+
+    def setup(self) -> None:
+        if self.parallel is not None:
+            self.parallel.start()
+
+    def teardown(self) -> None:
+        if self.parallel is not None:
+            self.parallel.close()
+
+    def score(self, rows: Tuple[int, ...], lines: int) -> float:
+        """Scores a board reached by clearing some lines.
+
+        Args:
+            rows (Tuple[int, ...]): The board as row bitmasks.
+            lines (int): The number of lines cleared by the last placement.
+
+        Returns:
+            float: The heuristic value (higher is better).
+        """
+
+        value = evaluate(rows, self.weights)
+
+        return value if value == LOSS else value + self.weights.lines * lines
+
+    def drops(
+        self, piece: Type[Piece], rows: Tuple[int, ...]
+    ) -> list[Tuple[float, Tuple[Cell, ...]]]:
+        """Scores every straight drop of a piece.
+
+        Args:
+            piece (Type[Piece]): The type of piece.
+            rows (Tuple[int, ...]): The board as row bitmasks.
+
+        Returns:
+            list[Tuple[float, Tuple[Cell, ...]]]: The value and cells of each drop, best first.
+        """
+
+        heights, board_features = surface(rows)
+        children = drop_values(piece, rows, heights, board_features, self.weights)
+        children.sort(key=lambda child: child[0], reverse=True)
+
+        return children
+
+    def lookahead(self, rows: Tuple[int, ...], depth: int) -> float:
+        """Gets the value of a board before the next piece is known.
+
+        Args:
+            rows (Tuple[int, ...]): The board as row bitmasks.
+            depth (int): The number of pieces still to place.
+
+        Returns:
+            float: The average over piece types of the best value reachable.
+        """
+
+        total = 0.0
+
+        for piece in PIECES:
+            children = self.drops(piece, rows) if can_spawn(piece, rows) else []
+
+            if not children:
+                total += LOSS
+            elif depth == 1 or children[0][0] == LOSS:
+                total += children[0][0]
+            else:
+                total += max(
+                    self.expand(rows, cells, depth - 1)
+                    for value, cells in children[: self.beam_width]
+                    if value != LOSS
+                )
+
+        return total / len(PIECES)
+
+    def expand(
+        self, rows: Tuple[int, ...], cells: Tuple[Cell, ...], depth: int
+    ) -> float:
+        """Gets the value of placing a piece and looking further ahead.
+
+        Args:
+            rows (Tuple[int, ...]): The board as row bitmasks.
+            cells (Tuple[Cell, ...]): The cells of the placed piece.
+            depth (int): The number of pieces still to place after this one.
+
+        Returns:
+            float: The value of any lines cleared plus that of the board after them.
+        """
+
+        new_rows, lines = place(rows, cells)
+
+        return self.weights.lines * lines + self.lookahead(new_rows, depth)
+
+    def evaluate_placement(
+        self, rows: Tuple[int, ...], cells: Tuple[Cell, ...]
+    ) -> float:
+        """Gets the value of placing the current piece, looking ahead to the full depth.
+
+        Args:
+            rows (Tuple[int, ...]): The board as row bitmasks, without the piece.
+            cells (Tuple[Cell, ...]): The cells of the placement.
+
+        Returns:
+            float: The value of the placement.
+        """
+
+        return self.expand(rows, cells, self.depth - 1)
+
+    def choose(
+        self, board: Board, deadline: float = float("inf")
+    ) -> Union[Action, Sequence[Action]]:
+        """Chooses where to place the current piece.
+
+        Args:
+            board (Board): The Tetris board.
+            deadline (float, optional): The time.perf_counter() value after which to
+                stop looking ahead and use the best placement found so far. Defaults to no deadline.
+
+        Returns:
+            Union[Action, Sequence[Action]]: The actions to reach the best placement.
+        """
+
+        piece = board.piece
+        if not piece or piece.landed:
+            return Action.NOOP
+
+        rows = board_rows(board)
+        placements = find_placements(
+            type(piece), rows, (piece.orientation, piece.y, piece.x)
+        )
+        if not placements:
+            return Action.HARD_DROP
+
+        candidates = [
+            (self.score(*place(rows, placement.cells)), placement)
+            for placement in placements
+        ]
+
+        # Stable, so ties go to the placement needing the fewest actions
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        best = candidates[0][1]
+
+        if self.depth > 1 and candidates[0][0] != LOSS:
+            beam = [
+                placement
+                for value, placement in candidates[: self.beam_width]
+                if value != LOSS
+            ]
+
+            if self.parallel is not None:
+                values = self.parallel.map(
+                    rows, [placement.cells for placement in beam], deadline
+                )
+            else:
+                values = []
+                for placement in beam:
+                    if time.perf_counter() >= deadline:
+                        break
+
+                    values.append(self.evaluate_placement(rows, placement.cells))
+
+            best_value = LOSS
+            for placement, value in zip(beam, values):
+                if value is not None and value > best_value:
+                    best_value = value
+                    best = placement
+
+        return list(best.actions)
+
+    async def play_move(self, board: Board) -> Union[Action, Sequence[Action]]:
+        return self.choose(board)
+
+    async def play_move_with_deadline(
+        self, board: Board, deadline: float
+    ) -> Union[Action, Sequence[Action]]:
+        return self.choose(board, deadline)
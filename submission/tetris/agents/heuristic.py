@@ -0,0 +1,240 @@
+from typing import Dict, NamedTuple, Sequence, Tuple, Type
+
+from tetris.constants import BOARD_WIDTH, Cell
+from tetris.piece import Piece
+from tetris.pieces import PIECES
+from tetris.search import place
+
+# The value of a position that loses the game
+LOSS: float = -1e9
+
+FULL_ROW: int = (1 << BOARD_WIDTH) - 1
+
+
+class Features(NamedTuple):
+    """Features of a board state used to judge how good it is."""
+
+    aggregate_height: int
+    holes: int
+    bumpiness: int
+
+
+class Weights(NamedTuple):
+    """The weight of each feature in the heuristic, and of each line cleared."""
+
+    aggregate_height: float = -0.510066
+    holes: float = -0.35663
+    bumpiness: float = -0.184483
+    lines: float = 0.760666
+
+
+DEFAULT_WEIGHTS = Weights()
+
+
+class DropProfile(NamedTuple):
+    """The shape of one orientation of a piece, as needed to drop it onto a board."""
+
+    cells: Tuple[Cell, ...]
+    min_dy: int
+    min_dx: int
+    max_dx: int
+    # (dx, top dy, bottom dy) of each column the piece covers, from left to right
+    columns: Tuple[Tuple[int, int, int], ...]
+    # (dy, mask) of each row the piece covers, with bit 0 of the mask for column min_dx
+    row_masks: Tuple[Tuple[int, int], ...]
+
+
+def _drop_profiles(piece: Type[Piece]) -> Tuple[DropProfile, ...]:
+    profiles = []
+    shapes = set()
+
+    for cells, (min_dy, _, min_dx, max_dx) in zip(piece.CELLS, piece.BOUNDS):
+
+        # Orientations with the same shape (e.g. the two horizontal I pieces) land in
+        # the same places, so only the first is needed
+        shape = frozenset((dy - min_dy, dx - min_dx) for dy, dx in cells)
+        if shape in shapes:
+            continue
+        shapes.add(shape)
+
+        columns = tuple(
+            (
+                dx,
+                min(dy for dy, cell_dx in cells if cell_dx == dx),
+                max(dy for dy, cell_dx in cells if cell_dx == dx),
+            )
+            for dx in range(min_dx, max_dx + 1)
+        )
+        row_masks = tuple(
+            (dy, sum(1 << (dx - min_dx) for cell_dy, dx in cells if cell_dy == dy))
+            for dy in sorted({dy for dy, _ in cells})
+        )
+
+        profiles.append(DropProfile(cells, min_dy, min_dx, max_dx, columns, row_masks))
+
+    return tuple(profiles)
+
+
+DROP_PROFILES: Dict[Type[Piece], Tuple[DropProfile, ...]] = {
+    piece: _drop_profiles(piece) for piece in PIECES
+}
+
+
+def surface(rows: Sequence[int]) -> Tuple[list[int], Features]:
+    """Finds the height of each column and the features of a board.
+
+    Args:
+        rows (Sequence[int]): The board as row bitmasks.
+
+    Returns:
+        Tuple[list[int], Features]: The height of the highest filled cell in each column
+        (or 0 if it is empty), and the features of the board.
+    """
+
+    height = len(rows)
+    heights = [0] * BOARD_WIDTH
+    covered = 0
+    holes = 0
+
+    for y, row in enumerate(rows):
+        holes += (covered & ~row).bit_count()
+
+        new = row & ~covered
+        while new:
+            x = (new & -new).bit_length() - 1
+            new &= new - 1
+            heights[x] = height - y
+
+        covered |= row
+
+    return heights, Features(
+        sum(heights),
+        holes,
+        sum(abs(a - b) for a, b in zip(heights, heights[1:])),
+    )
+
+
+def features(rows: Sequence[int]) -> Features:
+    """Computes the features of a board from its row bitmasks.
+
+    Args:
+        rows (Sequence[int]): The board as row bitmasks.
+
+    Returns:
+        Features: The sum of the column heights, the number of empty cells below a
+        filled cell in the same column, and the sum of the height differences between
+        neighbouring columns.
+    """
+
+    return surface(rows)[1]
+
+
+def evaluate(rows: Sequence[int], weights: Weights = DEFAULT_WEIGHTS) -> float:
+    """Scores a board, not counting any lines cleared to get there.
+
+    Args:
+        rows (Sequence[int]): The board as row bitmasks.
+        weights (Weights, optional): The weight of each feature. Defaults to DEFAULT_WEIGHTS.
+
+    Returns:
+        float: The weighted sum of the features (higher is better), or LOSS if the
+        stack has reached the top playable row, which ends the game.
+    """
+
+    if rows[0] or rows[1]:
+        return LOSS
+
+    aggregate_height, holes, bumpiness = features(rows)
+
+    return (
+        weights.aggregate_height * aggregate_height
+        + weights.holes * holes
+        + weights.bumpiness * bumpiness
+    )
+
+
+def drop_values(
+    piece: Type[Piece],
+    rows: Tuple[int, ...],
+    heights: Sequence[int],
+    board_features: Features,
+    weights: Weights = DEFAULT_WEIGHTS,
+) -> list[Tuple[float, Tuple[Cell, ...]]]:
+    """Scores every straight drop of a piece (the same drops as search.find_drops()),
+    updating the features of the board for each drop rather than building the new
+    board, unless the drop clears lines.
+
+    Args:
+        piece (Type[Piece]): The type of piece.
+        rows (Tuple[int, ...]): The board as row bitmasks.
+        heights (Sequence[int]): The column heights of the board, from surface().
+        board_features (Features): The features of the board, from surface().
+        weights (Weights, optional): The weight of each feature. Defaults to DEFAULT_WEIGHTS.
+
+    Returns:
+        list[Tuple[float, Tuple[Cell, ...]]]: The value of the board after each drop,
+        including any lines cleared (or LOSS if the game ends), and the piece's cells.
+    """
+
+    height = len(rows)
+    base_height, base_holes, base_bumpiness = board_features
+    drops = []
+
+    for cells, min_dy, min_dx, max_dx, columns, row_masks in DROP_PROFILES[piece]:
+        for x in range(-min_dx, BOARD_WIDTH - max_dx):
+            y = min(height - 1 - heights[x + dx] - bottom for dx, _, bottom in columns)
+            if y + min_dy < 0:
+                continue
+
+            landed = tuple((y + dy, x + dx) for dy, dx in cells)
+            left = x + min_dx
+
+            if any(rows[y + dy] | mask << left == FULL_ROW for dy, mask in row_masks):
+                new_rows, lines = place(rows, landed)
+                value = evaluate(new_rows, weights)
+                if value != LOSS:
+                    value += weights.lines * lines
+
+                drops.append((value, landed))
+                continue
+
+            if y + min_dy <= 1:
+                drops.append((LOSS, landed))
+                continue
+
+            aggregate_height = base_height
+            holes = base_holes
+            bumpiness = base_bumpiness
+            previous = heights[left - 1] if left else -1
+            old_previous = previous
+
+            # The piece lies on top of each column it covers, and its cells in a
+            # column are contiguous, so only the gap below its lowest one becomes holes
+            for dx, top, bottom in columns:
+                column = x + dx
+                old = heights[column]
+                new = height - y - top
+
+                aggregate_height += new - old
+                holes += height - 1 - y - bottom - old
+                if previous >= 0:
+                    bumpiness += abs(new - previous) - abs(old - old_previous)
+
+                previous = new
+                old_previous = old
+
+            right = x + max_dx + 1
+            if right < BOARD_WIDTH:
+                bumpiness += abs(heights[right] - previous)
+                bumpiness -= abs(heights[right] - old_previous)
+
+            drops.append(
+                (
+                    weights.aggregate_height * aggregate_height
+                    + weights.holes * holes
+                    + weights.bumpiness * bumpiness,
+                    landed,
+                )
+            )
+
+    return drops
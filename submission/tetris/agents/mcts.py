@@ -0,0 +1,501 @@
+import math
+import random
+import time
+from array import array
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+from tetris.agent import BaseAgent
+from tetris.agents.heuristic import (
+    DEFAULT_WEIGHTS,
+    LOSS,
+    Weights,
+    drop_values,
+    evaluate,
+    surface,
+)
+from tetris.board import Action, Board
+from tetris.constants import Cell
+from tetris.pieces import PIECES
+from tetris.search import board_rows, can_spawn, find_placements, place
+
+PIECE_INDICES = {piece: index for index, piece in enumerate(PIECES)}
+
+UNEXPANDED = -1
+
+
+class NodeStore:
+    """A fixed-capacity store of search tree nodes held in parallel arrays.
+
+    Each node is a board reached by placing a piece, identified by its index. The
+    children of a node for each type of next piece are stored in a contiguous block,
+    so a node only needs the index of the first child and the number of children
+    for each piece type. Nothing is allocated once the store is full.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.size = 0
+
+        # Per node
+        self.visits = array("l", bytes(capacity * array("l").itemsize))
+        self.totals = array("d", bytes(capacity * array("d").itemsize))
+        self.rewards = array("d", bytes(capacity * array("d").itemsize))
+        self.rows: list[Tuple[int, ...]] = [()] * capacity
+        self.cells: list[Tuple[Cell, ...]] = [()] * capacity
+
+        # Per node and piece type, at index node * len(PIECES) + piece
+        blocks = capacity * len(PIECES)
+        self.first = array("l", [UNEXPANDED]) * blocks
+        self.count = array("l", bytes(blocks * array("l").itemsize))
+        self.block_visits = array("l", bytes(blocks * array("l").itemsize))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def allocate(self, count: int) -> int:
+        """Reserves space for a block of new nodes.
+
+        Args:
+            count (int): The number of nodes.
+
+        Returns:
+            int: The index of the first node, or UNEXPANDED if the store is full.
+        """
+
+        if self.size + count > self.capacity:
+            return UNEXPANDED
+
+        first = self.size
+        self.size += count
+
+        for node in range(first, self.size):
+            self.visits[node] = 0
+            self.totals[node] = 0.0
+            self.rewards[node] = 0.0
+
+            block = node * len(PIECES)
+            for piece in range(len(PIECES)):
+                self.first[block + piece] = UNEXPANDED
+                self.count[block + piece] = 0
+                self.block_visits[block + piece] = 0
+
+        return first
+
+    def copy_node(self, source: "NodeStore", node: int, target: int) -> None:
+        """Copies a node's statistics and children from another store (or this one).
+
+        Args:
+            source (NodeStore): The store holding the node.
+            node (int): The index of the node in the source.
+            target (int): The index to copy it to in this store.
+        """
+
+        self.visits[target] = source.visits[node]
+        self.totals[target] = source.totals[node]
+        self.rewards[target] = source.rewards[node]
+        self.rows[target] = source.rows[node]
+        self.cells[target] = source.cells[node]
+
+        for piece in range(len(PIECES)):
+            self.first[target * len(PIECES) + piece] = source.first[
+                node * len(PIECES) + piece
+            ]
+            self.count[target * len(PIECES) + piece] = source.count[
+                node * len(PIECES) + piece
+            ]
+            self.block_visits[target * len(PIECES) + piece] = source.block_visits[
+                node * len(PIECES) + piece
+            ]
+
+    def retain(self, root: int, store: "NodeStore") -> int:
+        """Copies the subtree under a node into another store, replacing everything
+        that store held.
+
+        Args:
+            root (int): The node to keep.
+            store (NodeStore): The store to copy the subtree into.
+
+        Returns:
+            int: The index of the root in the other store.
+        """
+
+        store.size = 0
+        new_root = store.allocate(1)
+        store.copy_node(self, root, new_root)
+
+        pending = [new_root]
+        while pending:
+            node = pending.pop()
+
+            for block in range(node * len(PIECES), (node + 1) * len(PIECES)):
+                first = store.first[block]
+                if first == UNEXPANDED:
+                    continue
+
+                count = store.count[block]
+                new_first = store.allocate(count)
+                store.first[block] = new_first
+
+                for child in range(count):
+                    store.copy_node(self, first + child, new_first + child)
+                    pending.append(new_first + child)
+
+        return new_root
+
+
+class MCTSAgent(BaseAgent):
+    """An agent that plays the placement visited most by Monte Carlo Tree Search.
+
+    Each iteration walks down the tree, drawing the next piece at random at every
+    node and choosing among that piece's placements with UCB1, until it reaches a
+    node that has not been visited. From there, a rollout plays a few more random
+    pieces greedily on row bitmasks (using drop_values(), so no boards are copied),
+    and the value found (the heuristic value of any lines cleared along the way plus
+    that of the final board) is backed up the path. The current piece's placements
+    come from find_placements(), the rest from straight drops, and only the best
+    max_children placements of each piece by heuristic value are added to the tree.
+
+    The subtree under the chosen placement is kept for the next move, and the tree
+    lives in a NodeStore of fixed capacity, so memory use does not grow over a game.
+    Searching stops after time_budget seconds or at the deadline, whichever is
+    sooner.
+    """
+
+    def __init__(
+        self,
+        weights: Weights = DEFAULT_WEIGHTS,
+        time_budget: float = 0.08,
+        max_children: int = 4,
+        rollout_depth: int = 2,
+        exploration: float = 5.0,
+        loss_value: float = -500.0,
+        capacity: int = 1 << 13,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            weights (Weights, optional): The heuristic weights. Defaults to DEFAULT_WEIGHTS.
+            time_budget (float, optional): The longest to search for each move, in seconds. Defaults to 0.08.
+            max_children (int, optional): The number of placements of each piece added to the tree. Defaults to 4.
+            rollout_depth (int, optional): The number of pieces played in each rollout. Defaults to 2.
+            exploration (float, optional): The UCB1 exploration constant, in units of heuristic value. Defaults to 5.
+            loss_value (float, optional): The value of losing the game. Defaults to -500.
+            capacity (int, optional): The most nodes the tree can hold. Defaults to 1 << 13.
+            seed (Optional[int], optional): The seed for drawing pieces. Defaults to a random seed.
+        """
+
+        self.weights = weights
+        self.time_budget = time_budget
+        self.max_children = max_children
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+        self.loss_value = loss_value
+        self.random = random.Random(seed)
+
+        # The tree is copied between two stores to drop the nodes that are no longer
+        # reachable after each move
+        self.store = NodeStore(capacity)
+        self.spare = NodeStore(capacity)
+        self.root = UNEXPANDED
+        self.root_actions: Dict[int, Tuple[Action, ...]] = {}
+
+        # The number of iterations run for the last move, and how many nodes were reused
+        self.iterations = 0
+        self.reused = 0
+
+    def value(self, rows: Tuple[int, ...]) -> float:
+        """Gets the heuristic value of a board.
+
+        Args:
+            rows (Tuple[int, ...]): The board as row bitmasks.
+
+        Returns:
+            float: The value, or loss_value if the game is over.
+        """
+
+        value = evaluate(rows, self.weights)
+
+        return self.loss_value if value == LOSS else value
+
+    def rollout(self, rows: Tuple[int, ...]) -> float:
+        """Plays random pieces greedily from a board.
+
+        Args:
+            rows (Tuple[int, ...]): The board as row bitmasks.
+
+        Returns:
+            float: The value of the lines cleared plus that of the final board.
+        """
+
+        total = 0.0
+
+        for _ in range(self.rollout_depth):
+            piece = PIECES[self.random.randrange(len(PIECES))]
+            if can_spawn(piece, rows) is None:
+                return total + self.loss_value
+
+            heights, board_features = surface(rows)
+            drops = drop_values(piece, rows, heights, board_features, self.weights)
+            if not drops:
+                return total + self.loss_value
+
+            value, cells = max(drops, key=lambda drop: drop[0])
+            if value == LOSS:
+                return total + self.loss_value
+
+            rows, lines = place(rows, cells)
+            total += self.weights.lines * lines
+
+        return total + self.value(rows)
+
+    def expand(self, node: int, piece: int) -> None:
+        """Adds the best placements of a piece on a node's board as its children.
+
+        Args:
+            node (int): The node.
+            piece (int): The index into PIECES of the piece type.
+        """
+
+        store = self.store
+        rows = store.rows[node]
+        block = node * len(PIECES) + piece
+
+        if can_spawn(PIECES[piece], rows) is None:
+            drops = []
+        else:
+            heights, board_features = surface(rows)
+            drops = drop_values(
+                PIECES[piece], rows, heights, board_features, self.weights
+            )
+            drops.sort(key=lambda drop: drop[0], reverse=True)
+            drops = [drop for drop in drops[: self.max_children] if drop[0] != LOSS]
+
+        first = store.allocate(len(drops))
+        if first == UNEXPANDED:
+            return
+
+        store.first[block] = first
+        store.count[block] = len(drops)
+
+        for child, (_, cells) in enumerate(drops, first):
+            new_rows, lines = place(rows, cells)
+            store.rows[child] = new_rows
+            store.cells[child] = cells
+            store.rewards[child] = self.weights.lines * lines
+
+    def select(self, block: int) -> int:
+        """Chooses the child to visit with UCB1, trying each unvisited child first.
+
+        Args:
+            block (int): The index of the node's block of children for the piece.
+
+        Returns:
+            int: The child node.
+        """
+
+        store = self.store
+        first = store.first[block]
+        parent_visits = store.block_visits[block]
+        log_visits = math.log(parent_visits) if parent_visits else 0.0
+
+        best = first
+        best_score = -math.inf
+
+        for child in range(first, first + store.count[block]):
+            visits = store.visits[child]
+            if not visits:
+                return child
+
+            score = store.totals[child] / visits + self.exploration * math.sqrt(
+                log_visits / visits
+            )
+            if score > best_score:
+                best = child
+                best_score = score
+
+        return best
+
+    def iterate(self, root_piece: int) -> None:
+        """Runs one iteration of the search from the root.
+
+        Args:
+            root_piece (int): The index into PIECES of the current piece.
+        """
+
+        store = self.store
+        node = self.root
+        piece = root_piece
+        path: list[Tuple[int, int]] = []
+
+        while True:
+            block = node * len(PIECES) + piece
+
+            if store.first[block] == UNEXPANDED:
+                if store.visits[node] == 0 and path:
+                    value = self.rollout(store.rows[node])
+                    break
+
+                self.expand(node, piece)
+                if store.first[block] == UNEXPANDED:
+                    # The store is full, so evaluate the node without growing the tree
+                    value = self.rollout(store.rows[node])
+                    break
+
+            if not store.count[block]:
+                value = self.loss_value
+                break
+
+            child = self.select(block)
+            path.append((block, child))
+
+            node = child
+            piece = self.random.randrange(len(PIECES))
+
+        for block, child in reversed(path):
+            value += store.rewards[child]
+            store.visits[child] += 1
+            store.totals[child] += value
+            store.block_visits[block] += 1
+
+        store.visits[self.root] += 1
+
+    def set_root(self, board: Board) -> Optional[int]:
+        """Moves the root to the node for the board, keeping its subtree if the board
+        is what the last move was expected to produce, and adds the current piece's
+        placements as the root's children.
+
+        Args:
+            board (Board): The Tetris board.
+
+        Returns:
+            Optional[int]: The index into PIECES of the current piece, or None if it has no placements.
+        """
+
+        piece = board.piece
+        rows = board_rows(board)
+        placements = find_placements(
+            type(piece), rows, (piece.orientation, piece.y, piece.x)
+        )
+        if not placements:
+            return None
+
+        index = PIECE_INDICES[type(piece)]
+
+        if self.root != UNEXPANDED and self.store.rows[self.root] == rows:
+            self.root = self.store.retain(self.root, self.spare)
+            self.store, self.spare = self.spare, self.store
+        else:
+            self.store.size = 0
+            self.root = self.store.allocate(1)
+            self.store.rows[self.root] = rows
+
+        store = self.store
+        self.reused = len(store) - 1
+
+        # Keep the statistics of placements the tree already had for this piece, which
+        # are the straight drops among the current piece's placements
+        block = self.root * len(PIECES) + index
+        existing: Dict[frozenset[Cell], int] = {}
+        if store.first[block] != UNEXPANDED:
+            for child in range(
+                store.first[block], store.first[block] + store.count[block]
+            ):
+                existing[frozenset(store.cells[child])] = child
+
+        scored = []
+        for placement in placements:
+            new_rows, lines = place(rows, placement.cells)
+            value = self.value(new_rows) + self.weights.lines * lines
+            scored.append((value, placement))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        scored = scored[: max(self.max_children, len(existing))]
+
+        first = store.allocate(len(scored))
+        if first == UNEXPANDED:
+            # The reused tree fills the store, so start again
+            existing = {}
+            scored = scored[: self.max_children]
+            store.size = 0
+            self.root = store.allocate(1)
+            store.rows[self.root] = rows
+            block = self.root * len(PIECES) + index
+            first = store.allocate(len(scored))
+
+        self.root_actions = {}
+        for child, (_, placement) in enumerate(scored, first):
+            old = existing.get(frozenset(placement.cells))
+            if old is not None:
+                store.copy_node(store, old, child)
+            else:
+                new_rows, lines = place(rows, placement.cells)
+                store.rows[child] = new_rows
+                store.cells[child] = placement.cells
+                store.rewards[child] = self.weights.lines * lines
+
+            self.root_actions[child] = placement.actions
+
+        store.first[block] = first
+        store.count[block] = len(scored)
+        store.block_visits[block] = sum(
+            store.visits[child] for child in range(first, first + len(scored))
+        )
+
+        return index
+
+    def choose(
+        self, board: Board, deadline: float = math.inf
+    ) -> Union[Action, Sequence[Action]]:
+        """Searches for the best placement of the current piece.
+
+        Args:
+            board (Board): The Tetris board.
+            deadline (float, optional): The time.perf_counter() value by which to return. Defaults to no deadline.
+
+        Returns:
+            Union[Action, Sequence[Action]]: The actions to reach the best placement.
+        """
+
+        piece = board.piece
+        if not piece or piece.landed:
+            return Action.NOOP
+
+        stop = min(time.perf_counter() + self.time_budget, deadline)
+
+        index = self.set_root(board)
+        if index is None:
+            return Action.HARD_DROP
+
+        store = self.store
+        block = self.root * len(PIECES) + index
+
+        self.iterations = 0
+        while time.perf_counter() < stop:
+            self.iterate(index)
+            self.iterations += 1
+
+        first = store.first[block]
+        best = max(
+            range(first, first + store.count[block]),
+            key=lambda child: (
+                store.visits[child],
+                (
+                    store.totals[child] / store.visits[child]
+                    if store.visits[child]
+                    else 0.0
+                ),
+                -child,
+            ),
+        )
+
+        self.root = best
+
+        return list(self.root_actions[best])
+
+    async def play_move(self, board: Board) -> Union[Action, Sequence[Action]]:
+        return self.choose(board)
+
+    async def play_move_with_deadline(
+        self, board: Board, deadline: float
+    ) -> Union[Action, Sequence[Action]]:
+        return self.choose(board, deadline)
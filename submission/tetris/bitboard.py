@@ -0,0 +1,590 @@
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple, Type
+
+from tetris.board import Board
+from tetris.constants import (
+    BOARD_HEIGHT,
+    BOARD_WIDTH,
+    LINE_CLEAR_SCORES,
+    BoardState,
+    Cell,
+)
+from tetris.piece import Piece
+from tetris.pieces import PIECES
+from tetris.zobrist import CELL_KEYS
+
+FULL_ROW: int = (1 << BOARD_WIDTH) - 1
+
+# The number of cells on the board, and so the length of a colour layer
+CELLS: int = BOARD_HEIGHT * BOARD_WIDTH
+
+# The cells vacated and newly occupied by a piece move, as in the Piece move tables
+PieceMove = Tuple[Tuple[Cell, ...], Tuple[Cell, ...]]
+
+# Reported for filled cells when the colour layer is disabled
+FILLED_CELL: str = "X"
+
+
+# The (y, vacated mask, occupied mask) of each row a piece move changes
+RowChanges = Tuple[Tuple[int, int, int], ...]
+
+
+class MaskedMove(NamedTuple):
+    """A piece move from one of the Piece move tables, with its effect on the row
+    masks and hashes worked out in advance."""
+
+    # The (orientation, y, x) of the piece after the move
+    state: Tuple[int, int, int]
+    old: Tuple[Cell, ...]
+    new: Tuple[Cell, ...]
+    changes: RowChanges
+    # The values to XOR into the hashes, with the piece's cells hashed as its type
+    # or as FILLED_CELL
+    type_hashes: int
+    filled_hashes: int
+
+
+# A MaskedMove from each (orientation, y, x), or None where there is no move
+MoveTable = Tuple[Tuple[Tuple[Optional[MaskedMove], ...], ...], ...]
+
+
+class PieceMasks(NamedTuple):
+    """The masked moves of every Piece move table of one type of piece."""
+
+    left: MoveTable
+    right: MoveTable
+    fall: MoveTable
+    clockwise: MoveTable
+    anticlockwise: MoveTable
+    # The piece placed on an empty board at each (orientation, y, x)
+    shapes: MoveTable
+
+
+def _masked_move(
+    piece: Type[Piece], state: Tuple[int, int, int], move: PieceMove
+) -> MaskedMove:
+    """Works out how a piece move changes the row masks and the packed hashes, given
+    that the vacated cells hold the piece and the occupied cells are empty.
+
+    Args:
+        piece (Type[Piece]): The type of piece.
+        state (Tuple[int, int, int]): The (orientation, y, x) after the move.
+        move (PieceMove): The cells vacated and newly occupied.
+
+    Returns:
+        MaskedMove: The move.
+    """
+
+    old, new = move
+    type_keys = CELL_KEYS[piece.piece_type]
+    filled_keys = CELL_KEYS[FILLED_CELL]
+    masks: dict[int, list[int]] = {}
+    type_hashes = filled_hashes = 0
+
+    for index, cells in enumerate((old, new)):
+        for y, x in cells:
+            masks.setdefault(y, [0, 0])[index] |= 1 << x
+            type_hashes ^= type_keys[y][x]
+            filled_hashes ^= filled_keys[y][x]
+
+    return MaskedMove(
+        state,
+        tuple(old),
+        tuple(new),
+        tuple((y, vacated, occupied) for y, (vacated, occupied) in masks.items()),
+        type_hashes,
+        filled_hashes,
+    )
+
+
+# The masked move tables of each type of piece, built when the first bitboard is
+# created (or when a piece not in PIECES is first moved)
+_PIECE_MASKS: Dict[Type[Piece], PieceMasks] = {}
+
+
+def _piece_masks(piece: Type[Piece]) -> PieceMasks:
+    """Masks the move tables of a type of piece and stores them in _PIECE_MASKS.
+
+    Args:
+        piece (Type[Piece]): The type of piece.
+
+    Returns:
+        PieceMasks: The masked move tables.
+    """
+
+    def shift(table: Tuple, dy: int, dx: int) -> MoveTable:
+        return piece._table(
+            lambda o, y, x: (
+                _masked_move(piece, (o, y + dy, x + dx), move)
+                if (move := table[o][y][x])
+                else None
+            )
+        )
+
+    def rotate(table: Tuple) -> MoveTable:
+        return piece._table(
+            lambda o, y, x: (
+                _masked_move(piece, rotation[:3], rotation[3:])
+                if (rotation := table[o][y][x])
+                else None
+            )
+        )
+
+    masks = _PIECE_MASKS[piece] = PieceMasks(
+        shift(piece._LEFT, 0, -1),
+        shift(piece._RIGHT, 0, 1),
+        shift(piece._FALL, 1, 0),
+        rotate(piece._CLOCKWISE),
+        rotate(piece._ANTICLOCKWISE),
+        piece._table(
+            lambda o, y, x: (
+                _masked_move(
+                    piece,
+                    (o, y, x),
+                    ((), tuple((y + dy, x + dx) for dy, dx in piece.CELLS[o])),
+                )
+                if piece.fits(o, y, x)
+                else None
+            )
+        ),
+    )
+
+    return masks
+
+
+class BitRow(int):
+    """A board row stored as a bitmask, where bit x is set if column x is filled.
+
+    Indexing a row by column returns 1 if the cell is filled else 0, and iterating
+    over it gives each of its BOARD_WIDTH cells in turn, so rows can be passed to the
+    piece rules in place of a list of cells.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, x: int) -> int:  # type: ignore[override]
+        return (self >> x) & 1
+
+    def __iter__(self) -> Iterator[int]:
+        return ((self >> x) & 1 for x in range(BOARD_WIDTH))
+
+    def __len__(self) -> int:
+        return BOARD_WIDTH
+
+
+# Every row, shared between boards since rows are immutable
+ROWS: Tuple[BitRow, ...] = tuple(BitRow(mask) for mask in range(1 << BOARD_WIDTH))
+
+EMPTY_ROW = ROWS[0]
+
+
+class BitBoard(Board):
+    """A Tetris board storing each row as a 10-bit integer.
+
+    Line, game-over and collision checks are done on the row masks, with the masks
+    of every piece move worked out in advance (see MaskedMove). The piece types
+    of filled cells are kept in a separate colour layer, a flat list indexed by
+    y * BOARD_WIDTH + x, which can be disabled when only the shape of the stack
+    matters (e.g. during search), in which case every filled cell is hashed as
+    FILLED_CELL.
+    """
+
+    __slots__ = ("colours",)
+
+    board: list[BitRow]  # type: ignore[assignment]
+    colours: Optional[list[str | None]]
+
+    def __init__(self, track_colours: bool = True) -> None:
+        super().__init__()
+
+        self.board = [EMPTY_ROW] * BOARD_HEIGHT
+        self.colours = [None] * CELLS if track_colours else None
+
+        # Building the tables takes a fraction of a second, so it is done up front
+        # rather than during the first move of each type of piece
+        if not _PIECE_MASKS:
+            for piece in PIECES:
+                _piece_masks(piece)
+
+    @classmethod
+    def from_board(cls, board: Board, track_colours: bool = True) -> "BitBoard":
+        """Creates a bitboard with the same cells as a board and a copy of its current piece.
+
+        Args:
+            board (Board): The board to convert.
+            track_colours (bool, optional): Whether to keep the colour layer. Defaults to True.
+
+        Returns:
+            BitBoard: The converted board.
+        """
+
+        bitboard = cls(track_colours)
+        bitboard.board = [
+            ROWS[sum(1 << x for x, cell in enumerate(row) if cell)]
+            for row in board.board
+        ]
+
+        if bitboard.colours is not None:
+            bitboard.colours = [cell for row in board.board for cell in row]
+
+        bitboard.piece = board.piece.clone() if board.piece else None
+        bitboard.heights = board.heights[:]
+        bitboard.rehash()
+
+        return bitboard
+
+    def to_board(self) -> Board:
+        """Creates a list-of-lists board with the same cells and a copy of the current piece.
+
+        Returns:
+            Board: The converted board.
+        """
+
+        board = Board()
+        board.board = self.to_board_state()
+        board.piece = self.piece.clone() if self.piece else None
+        board.heights = self.heights[:]
+        board.hashes = self.hashes
+
+        return board
+
+    def to_board_state(self) -> BoardState:
+        """Expands the row masks into the list-of-lists board state.
+
+        Returns:
+            BoardState: The board, using FILLED_CELL for cells of unknown type.
+        """
+
+        colours = self.colours
+        if colours is not None:
+            return [
+                colours[start : start + BOARD_WIDTH]
+                for start in range(0, CELLS, BOARD_WIDTH)
+            ]
+
+        return [
+            [FILLED_CELL if row >> x & 1 else None for x in range(BOARD_WIDTH)]
+            for row in self.board
+        ]
+
+    def is_game_running(self) -> bool:
+        return not self.board[1]
+
+    def copy(self) -> list[BitRow]:  # type: ignore[override]
+        """Copies the row masks. Rows are immutable, so a shallow copy suffices.
+
+        Returns:
+            list[BitRow]: The row masks.
+        """
+
+        return self.board[:]
+
+    def clone(self) -> "BitBoard":
+        board: BitBoard = super().clone()  # type: ignore[assignment]
+        board.colours = self.colours[:] if self.colours is not None else None
+
+        return board
+
+    def get_changes(  # type: ignore[override]
+        self, old_board: list[BitRow]
+    ) -> list[Tuple[str | None, int, int]]:
+        changes: list[Tuple[str | None, int, int]] = []
+
+        for y, (row, old_row) in enumerate(zip(self.board, old_board)):
+            diff = row ^ old_row
+
+            while diff:
+                x = (diff & -diff).bit_length() - 1
+                diff &= diff - 1
+
+                if not row >> x & 1:
+                    changes.append(("N", y, x))
+                else:
+                    changes.append((self._cell_value(y, x), y, x))
+
+        return changes
+
+    def _cell_value(self, y: int, x: int) -> str | None:
+        if self.colours is not None:
+            return self.colours[y * BOARD_WIDTH + x]
+
+        return FILLED_CELL if self.board[y] >> x & 1 else None
+
+    def recompute_heights(self) -> None:
+        rows: list[int] = list(self.board)
+
+        piece = self.piece
+        if piece and not piece.landed:
+            for y, x in piece.cells():
+                rows[y] &= ~(1 << x)
+
+        heights = self.heights
+        heights[:] = [0] * BOARD_WIDTH
+        seen = 0
+
+        for y, row in enumerate(rows):
+            new = row & ~seen
+
+            while new:
+                x = (new & -new).bit_length() - 1
+                new &= new - 1
+                heights[x] = BOARD_HEIGHT - y
+
+            seen |= row
+            if seen == FULL_ROW:
+                break
+
+    def _hash_rows(self, rows: range) -> int:
+        colours = self.colours
+        packed = 0
+
+        for y in rows:
+            row = self.board[y]
+            start = y * BOARD_WIDTH
+
+            while row:
+                x = (row & -row).bit_length() - 1
+                row &= row - 1
+
+                value = colours[start + x] if colours is not None else FILLED_CELL
+                packed ^= CELL_KEYS[value][y][x]  # type: ignore[index]
+
+        return packed
+
+    def find_lines_to_clear(self) -> list[int]:
+        return [i for i in reversed(range(BOARD_HEIGHT)) if self.board[i] == FULL_ROW]
+
+    def clear_lines(self, line_indices: list[int]) -> int:
+        if not line_indices:
+            return 0
+
+        self._record(
+            [(y, x) for y in range(max(line_indices) + 1) for x in range(BOARD_WIDTH)]
+        )
+
+        shifted = range(max(line_indices) + 1)
+        hashes = self._hash_rows(shifted)
+
+        for i in sorted(line_indices, reverse=True):
+            del self.board[i]
+
+            if self.colours is not None:
+                del self.colours[i * BOARD_WIDTH : (i + 1) * BOARD_WIDTH]
+
+        self.board = [EMPTY_ROW] * len(line_indices) + self.board
+
+        if self.colours is not None:
+            self.colours = [None] * (len(line_indices) * BOARD_WIDTH) + self.colours
+
+        self.hashes ^= hashes ^ self._hash_rows(shifted)
+
+        self.recompute_heights()
+
+        return LINE_CLEAR_SCORES[len(line_indices)]
+
+    def update_board(self, old: list[Cell], new: list[Cell]) -> None:
+        board = self.board
+        colours = self.colours
+
+        if self._journal is not None:
+            self._record(old)
+            self._record(new)
+
+        hashes = self.hashes
+
+        for y, x in old:
+            if 0 <= y < BOARD_HEIGHT and 0 <= x < BOARD_WIDTH:
+                if board[y] >> x & 1:
+                    hashes ^= CELL_KEYS[self._cell_value(y, x)][y][x]  # type: ignore[index]
+
+                board[y] = ROWS[board[y] & ~(1 << x)]
+
+                if colours is not None:
+                    colours[y * BOARD_WIDTH + x] = None
+            else:
+                raise RuntimeError("Cell out of bounds of the board.")
+
+        if self.piece:
+            piece_type = self.piece.piece_type
+            keys = CELL_KEYS[piece_type if colours is not None else FILLED_CELL]
+
+            for y, x in new:
+                if 0 <= y < BOARD_HEIGHT and 0 <= x < BOARD_WIDTH:
+                    if board[y] >> x & 1:
+                        hashes ^= CELL_KEYS[self._cell_value(y, x)][y][x]  # type: ignore[index]
+
+                    board[y] = ROWS[board[y] | 1 << x]
+                    hashes ^= keys[y][x]
+
+                    if colours is not None:
+                        colours[y * BOARD_WIDTH + x] = piece_type
+                else:
+                    raise RuntimeError("Cell out of bounds of the board.")
+
+        self.hashes = hashes
+
+        if self.piece and self.piece.landed:
+            self.recompute_heights()
+
+    def _move_piece(self, move: MaskedMove) -> None:
+        """Moves the current piece into cells known to be free, updating the row masks
+        and hashes a whole row at a time.
+
+        Args:
+            move (MaskedMove): The move.
+        """
+
+        piece = self.piece
+        assert piece is not None
+
+        state, old, new, changes, type_hashes, filled_hashes = move
+        piece.orientation, piece.y, piece.x = state
+
+        if self._journal is not None:
+            self._record(old)
+            self._record(new)
+
+        board = self.board
+        for y, vacated, occupied in changes:
+            board[y] = ROWS[board[y] & ~vacated | occupied]
+
+        colours = self.colours
+        if colours is not None:
+            self.hashes ^= type_hashes
+            piece_type = piece.piece_type
+
+            for y, x in old:
+                colours[y * BOARD_WIDTH + x] = None
+            for y, x in new:
+                colours[y * BOARD_WIDTH + x] = piece_type
+        else:
+            self.hashes ^= filled_hashes
+
+        if piece.landed:
+            self.recompute_heights()
+
+    def _try_move(self, move: Optional[MaskedMove]) -> None:
+        """Makes a move of the current piece, if there is one and its cells are free.
+
+        Args:
+            move (Optional[MaskedMove]): The move, from the piece's masked move tables.
+        """
+
+        if move and not self.collides(move.changes):
+            self._move_piece(move)
+
+    def move_piece_left(self) -> None:
+        piece = self.piece
+        if piece:
+            masks = _PIECE_MASKS.get(type(piece)) or _piece_masks(type(piece))
+            self._try_move(masks.left[piece.orientation][piece.y][piece.x])
+
+    def move_piece_right(self) -> None:
+        piece = self.piece
+        if piece:
+            masks = _PIECE_MASKS.get(type(piece)) or _piece_masks(type(piece))
+            self._try_move(masks.right[piece.orientation][piece.y][piece.x])
+
+    def rotate_piece_clockwise(self) -> None:
+        piece = self.piece
+        if piece:
+            masks = _PIECE_MASKS.get(type(piece)) or _piece_masks(type(piece))
+            self._try_move(masks.clockwise[piece.orientation][piece.y][piece.x])
+
+    def rotate_piece_anticlockwise(self) -> None:
+        piece = self.piece
+        if piece:
+            masks = _PIECE_MASKS.get(type(piece)) or _piece_masks(type(piece))
+            self._try_move(masks.anticlockwise[piece.orientation][piece.y][piece.x])
+
+    def fall(self) -> None:
+        piece = self.piece
+        if not piece:
+            return
+
+        masks = _PIECE_MASKS.get(type(piece)) or _piece_masks(type(piece))
+        move = masks.fall[piece.orientation][piece.y][piece.x]
+        piece.landed = not move or self.collides(move.changes)
+
+        if move and not piece.landed:
+            self._move_piece(move)
+        else:
+            self._settle_piece()
+
+    def hard_drop(self) -> None:
+        """Drops the current piece until it lands, finding where on the row masks and
+        then moving it in a single update."""
+
+        piece = self.piece
+        if not piece or piece.landed:
+            return
+
+        masks = _PIECE_MASKS.get(type(piece)) or _piece_masks(type(piece))
+        orientation, y, x = piece.orientation, piece.y, piece.x
+        falls = masks.fall[orientation]
+
+        # The cells below the piece never include its own cells, which are higher up
+        landing = y
+        while True:
+            move = falls[landing][x]
+            if not move or self.collides(move.changes):
+                break
+
+            landing += 1
+
+        if landing > y:
+            before = masks.shapes[orientation][y][x]
+            after = masks.shapes[orientation][landing][x]
+            assert before is not None and after is not None
+
+            # Emptying the rows the piece leaves before filling the rows it lands in
+            # handles any rows it is in both before and after
+            self._move_piece(
+                MaskedMove(
+                    after.state,
+                    before.new,
+                    after.new,
+                    tuple((row, filled, 0) for row, _, filled in before.changes)
+                    + after.changes,
+                    before.type_hashes ^ after.type_hashes,
+                    before.filled_hashes ^ after.filled_hashes,
+                )
+            )
+
+        piece.landed = True
+        self._settle_piece()
+
+    def _save_cells(self) -> Tuple[list[BitRow], Optional[list[str | None]]]:
+        # Rows are immutable, so a shallow copy is a snapshot of the whole board
+        return self.board[:], self.colours[:] if self.colours is not None else None
+
+    def _restore_cells(
+        self, saved: Tuple[list[BitRow], Optional[list[str | None]]]
+    ) -> None:
+        rows, colours = saved
+
+        if self._journal is not None:
+            for y, (row, saved_row) in enumerate(zip(self.board, rows)):
+                if row != saved_row:
+                    self._record([(y, x) for x in range(BOARD_WIDTH)])
+
+        self.board = rows
+        self.colours = colours
+
+    def collides(self, changes: RowChanges) -> bool:
+        """Checks whether a move would take the piece into filled cells.
+
+        Args:
+            changes (RowChanges): The (y, vacated mask, occupied mask) of each row the
+                move changes.
+
+        Returns:
+            bool: True if any of the newly occupied cells is filled else False.
+        """
+
+        board = self.board
+
+        for y, _, occupied in changes:
+            if board[y] & occupied:
+                return True
+
+        return False
@@ -1,6 +1,6 @@
-import copy
+from contextlib import contextmanager
 from enum import IntEnum
-from typing import Sequence, Tuple
+from typing import TYPE_CHECKING, Any, Iterator, Optional, Sequence, Tuple
 
 from tetris.constants import (
     BOARD_HEIGHT,
@@ -8,8 +8,13 @@ from tetris.constants import (
     LINE_CLEAR_SCORES,
     BoardState,
     Cell,
+    PieceState,
 )
 from tetris.piece import Piece
+from tetris.zobrist import CELL_KEYS, SHAPE_MASK, board_hash
+
+if TYPE_CHECKING:
+    from tetris.search import Placement
 
 
 class Action(IntEnum):
@@ -22,13 +27,42 @@ class Action(IntEnum):
 
 
 class Board:
+    __slots__ = (
+        "board",
+        "piece",
+        "heights",
+        "hashes",
+        "_undo",
+        "_journal",
+    )
+
     board: BoardState
     piece: Piece | None
-    running: bool
+
+    # Height of the settled stack in each column, not counting the current piece
+    # until it has landed
+    heights: list[int]
+
+    # Each entry holds the piece state, column heights, hashes and saved cells (see
+    # _save_cells()) from before push_actions()
+    _undo: list[Tuple[Optional[PieceState], list[int], int, Any]]
+
+    # Both Zobrist hashes of the cells on the board (including the current piece),
+    # packed as in zobrist.CELL_KEYS and kept up to date by update_board() and
+    # clear_lines()
+    hashes: int
+
+    # The value each cell had when the journal was last drained, for every cell
+    # written since then, or None if changes are not being tracked
+    _journal: Optional[dict[Cell, str | None]]
 
     def __init__(self) -> None:
         self.board = [[None] * BOARD_WIDTH for _ in range(BOARD_HEIGHT)]
         self.piece = None
+        self.heights = [0] * BOARD_WIDTH
+        self.hashes = 0
+        self._undo = []
+        self._journal = None
 
     def set_piece(self, piece: Piece) -> None:
         """Sets a piece to be the current piece being controlled.
@@ -37,8 +71,76 @@ class Board:
             piece (Piece): A Tetris piece.
         """
 
+        # The cells of a piece left mid-air are part of the stack from now on
+        if self.piece and not self.piece.landed:
+            self.piece = None
+            self.recompute_heights()
+
         self.piece = piece
 
+    def recompute_heights(self) -> None:
+        """Recomputes the column heights from the cells on the board.
+
+        The heights are kept up to date by update_board() and clear_lines(), so this
+        must be called after writing to the board directly (e.g. to set up a position).
+        Until then, anything reading the heights, such as drop_distance(), sees the
+        old stack.
+        """
+
+        piece = self.piece
+        ignored = set(piece.cells()) if piece and not piece.landed else set()
+
+        heights = self.heights
+        heights[:] = [0] * BOARD_WIDTH
+        unknown = BOARD_WIDTH
+
+        # Scan down from the top, skipping empty rows, until every column has a height
+        for y, row in enumerate(self.board):
+            if row.count(None) == BOARD_WIDTH:
+                continue
+
+            for x, cell in enumerate(row):
+                if cell and not heights[x] and (y, x) not in ignored:
+                    heights[x] = BOARD_HEIGHT - y
+                    unknown -= 1
+
+            if not unknown:
+                break
+
+    @property
+    def zobrist(self) -> int:
+        """A 64-bit Zobrist hash of the cells on the board and the piece type in each."""
+
+        return self.hashes >> 64
+
+    @property
+    def shape_zobrist(self) -> int:
+        """A 64-bit Zobrist hash of which cells on the board are filled."""
+
+        return self.hashes & SHAPE_MASK
+
+    def rehash(self) -> None:
+        """Recomputes the Zobrist hashes from the cells on the board.
+
+        This only needs calling after writing to the board directly.
+        """
+
+        self.hashes = self._hash_rows(range(BOARD_HEIGHT))
+
+    def _hash_rows(self, rows: range) -> int:
+        return board_hash(self.board, rows)
+
+    def _settle_piece(self) -> None:
+        """Adds the cells of the landed piece to the column heights."""
+
+        if not self.piece:
+            return
+
+        heights = self.heights
+        for y, x in self.piece.cells():
+            if heights[x] < BOARD_HEIGHT - y:
+                heights[x] = BOARD_HEIGHT - y
+
     def is_game_running(self) -> bool:
         """Checks the board to see if there are any cells filled in the top playable row.
            If there are, the player has lost the game.
@@ -56,7 +158,24 @@ class Board:
             BoardState: The board.
         """
 
-        return copy.deepcopy(self.board)
+        return [row[:] for row in self.board]
+
+    def clone(self) -> "Board":
+        """Copies the board's rows and current piece without going through deepcopy.
+
+        Returns:
+            Board: An independent copy of the board.
+        """
+
+        board = self.__class__.__new__(self.__class__)
+        board.board = self.copy()
+        board.piece = self.piece.clone() if self.piece else None
+        board.heights = self.heights[:]
+        board.hashes = self.hashes
+        board._undo = []
+        board._journal = None
+
+        return board
 
     def get_changes(self, old_board: BoardState) -> list[Tuple[str | None, int, int]]:
         """Identifies differences between the current board and another board state.
@@ -75,6 +194,59 @@ class Board:
             if self.board[i][j] != piece_type
         ]
 
+    def track_changes(self) -> None:
+        """Starts recording which cells are written to, so that drain_changes() can
+        report the differences without comparing against a copy of the board."""
+
+        self._journal = {}
+
+    def _cell_value(self, y: int, x: int) -> str | None:
+        return self.board[y][x]
+
+    def _record(self, cells: Sequence[Cell]) -> None:
+        """Remembers the current values of cells that are about to be written to.
+
+        Args:
+            cells (Sequence[Cell]): The (y, x) coordinates of the cells.
+        """
+
+        journal = self._journal
+        if journal is None:
+            return
+
+        for cell in cells:
+            if (
+                cell not in journal
+                and 0 <= cell[0] < BOARD_HEIGHT
+                and 0 <= cell[1] < BOARD_WIDTH
+            ):
+                journal[cell] = self._cell_value(*cell)
+
+    def drain_changes(self) -> list[Tuple[str | None, int, int]]:
+        """Gets the cells that have changed since the last call and resets the journal.
+
+        Equivalent to get_changes() against a copy of the board taken at the last call
+        (or when track_changes() was called).
+
+        Returns:
+            list[Tuple[str, int, int]]: A list of changes in the form (cell_value, y, x).
+        """
+
+        journal = self._journal
+        if not journal:
+            return []
+
+        changes = []
+        for (y, x), value in sorted(journal.items()):
+            current = self._cell_value(y, x)
+
+            if current != value:
+                changes.append(("N" if not current else current, y, x))
+
+        journal.clear()
+
+        return changes
+
     def find_lines_to_clear(self) -> list[int]:
         """Iterates through each row in the board to see if it's full and can be cleared.
 
@@ -98,6 +270,14 @@ class Board:
         if not line_indices:
             return 0
 
+        # Every row down to the lowest cleared line shifts
+        self._record(
+            [(y, x) for y in range(max(line_indices) + 1) for x in range(BOARD_WIDTH)]
+        )
+
+        shifted = range(max(line_indices) + 1)
+        hashes = self._hash_rows(shifted)
+
         for i in sorted(line_indices, reverse=True):
             del self.board[i]
 
@@ -105,6 +285,11 @@ class Board:
             [None] * BOARD_WIDTH for _ in range(len(line_indices))
         ] + self.board  # type: ignore
 
+        # Swap the hashes of the rows that moved for those of the rows now there
+        self.hashes ^= hashes ^ self._hash_rows(shifted)
+
+        self.recompute_heights()
+
         return LINE_CLEAR_SCORES[len(line_indices)]
 
     def update_board(self, old: list[Cell], new: list[Cell]) -> None:
@@ -117,19 +302,42 @@ class Board:
             new (list[Cell]): The new (y, x) coordinates of the piece to be added.
         """
 
-        for old_cell in old:
-            if 0 <= old_cell[0] < BOARD_HEIGHT and 0 <= old_cell[1] < BOARD_WIDTH:
-                self.board[old_cell[0]][old_cell[1]] = None
+        if self._journal is not None:
+            self._record(old)
+            self._record(new)
+
+        board = self.board
+        hashes = self.hashes
+
+        for y, x in old:
+            if 0 <= y < BOARD_HEIGHT and 0 <= x < BOARD_WIDTH:
+                if value := board[y][x]:
+                    hashes ^= CELL_KEYS[value][y][x]
+
+                board[y][x] = None
             else:
                 raise RuntimeError("Cell out of bounds of the board.")
 
         if self.piece:
-            for new_cell in new:
-                if 0 <= new_cell[0] < BOARD_HEIGHT and 0 <= new_cell[1] < BOARD_WIDTH:
-                    self.board[new_cell[0]][new_cell[1]] = self.piece.piece_type
+            piece_type = self.piece.piece_type
+            keys = CELL_KEYS[piece_type]
+
+            for y, x in new:
+                if 0 <= y < BOARD_HEIGHT and 0 <= x < BOARD_WIDTH:
+                    if value := board[y][x]:
+                        hashes ^= CELL_KEYS[value][y][x]
+
+                    board[y][x] = piece_type
+                    hashes ^= keys[y][x]
                 else:
                     raise RuntimeError("Cell out of bounds of the board.")
 
+        self.hashes = hashes
+
+        # A landed piece is part of the stack, so moving it changes the heights
+        if self.piece and self.piece.landed:
+            self.recompute_heights()
+
     def spawn_piece(self) -> bool:
         """Spawns the board object's current piece on the board.
 
@@ -211,17 +419,98 @@ class Board:
     def fall(self) -> None:
         """Drops the current piece one position if it has not yet landed and updates the board if required."""
 
-        if not self.piece:
+        piece = self.piece
+        if not piece:
             return
 
-        self.piece.landed = self.piece.has_landed(self.board)
-        if not self.piece.landed:
-            old, new = self.piece.fall()
+        # The cells decide, as the column heights go stale if the board is written to
+        # directly, and a single step reads no more cells than has_landed() does
+        piece.landed = piece.has_landed(self.board)
+
+        if not piece.landed:
+            old, new = piece.fall()
 
             if (old is None) ^ (new is None):
                 raise RuntimeError("Error computing piece fall.")
 
             self.update_board(old, new)
+        else:
+            self._settle_piece()
+
+    def drop_distance(self) -> Optional[int]:
+        """Computes how many rows the current piece can fall from the column heights.
+
+        Returns:
+            Optional[int]: The number of rows, or None if the piece is below the top of
+            the stack in one of its columns (e.g. tucked under an overhang).
+        """
+
+        piece = self.piece
+        if not piece:
+            return None
+
+        return piece.drop_distance(piece.orientation, piece.y, piece.x, self.heights)
+
+    def _is_clear_drop(self, piece: Piece, distance: int) -> bool:
+        """Checks a drop distance worked out from the column heights against the cells.
+
+        Args:
+            piece (Piece): The piece being dropped.
+            distance (int): The number of rows the piece would fall.
+
+        Returns:
+            bool: True if the cells the piece falls through are empty and it lands
+            where it stops, else False.
+        """
+
+        board = self.board
+        landed = False
+
+        for dy, dx in piece.BOTTOMS[piece.orientation]:
+            x = piece.x + dx
+            top = piece.y + dy + 1
+            below = top + distance
+
+            for row in board[top:below]:
+                if row[x]:
+                    return False
+
+            if below == BOARD_HEIGHT or board[below][x]:
+                landed = True
+
+        return landed
+
+    def hard_drop(self) -> None:
+        """Drops the current piece until it lands, moving it in a single board update
+        when the column heights show nothing is in its way."""
+
+        piece = self.piece
+        if not piece or piece.landed:
+            return
+
+        distance = self.drop_distance()
+        if distance is not None and not self._is_clear_drop(piece, distance):
+            # The board was written to without recomputing the heights
+            self.recompute_heights()
+            distance = self.drop_distance()
+
+        if distance is None:
+            while not piece.landed:
+                self.fall()
+            return
+
+        if distance:
+            old = piece.cells()
+            piece.y += distance
+            new = piece.cells()
+
+            self.update_board(
+                [cell for cell in old if cell not in new],
+                [cell for cell in new if cell not in old],
+            )
+
+        piece.landed = True
+        self._settle_piece()
 
     def apply_action(self, action: Action) -> None:
         """Applies an action to the current board.
@@ -231,9 +520,7 @@ class Board:
         """
 
         if action == Action.HARD_DROP:
-            if self.piece:
-                while not self.piece.landed:
-                    self.fall()
+            self.hard_drop()
             return
         elif action == Action.ROTATE_ANTICLOCKWISE:
             self.rotate_piece_anticlockwise()
@@ -268,7 +555,7 @@ class Board:
             Board: A copy of the current board with the actions applied.
         """
 
-        board = copy.deepcopy(self)
+        board = self.clone()
 
         for action in actions:
             board.apply_action(action)
@@ -278,6 +565,117 @@ class Board:
 
         return board
 
+    def push_actions(self, actions: Sequence[Action]) -> None:
+        """Applies the sequence of actions to this board in place, recording the changes
+           so they can be undone with pop().
+
+        Args:
+            actions (Sequence[Action]): The actions to perform.
+        """
+
+        piece = self.piece
+        state = (piece.x, piece.y, piece.orientation, piece.landed) if piece else None
+
+        self._undo.append((state, self.heights[:], self.hashes, self._save_cells()))
+
+        for action in actions:
+            self.apply_action(action)
+
+            if piece and piece.landed:
+                break
+
+    def pop(self) -> None:
+        """Undoes the most recent push_actions(), restoring the cells and the piece.
+
+        Raises:
+            IndexError: There are no actions to undo.
+        """
+
+        state, heights, hashes, saved = self._undo.pop()
+
+        # The piece is still where the actions left it, which tells which cells to empty
+        self._restore_cells(saved)
+
+        if self.piece and state:
+            (
+                self.piece.x,
+                self.piece.y,
+                self.piece.orientation,
+                self.piece.landed,
+            ) = state
+
+        self.hashes = hashes
+        self.heights = heights
+
+    def _save_cells(self) -> Any:
+        """Saves what pop() needs to restore the cells after push_actions().
+
+        Actions only ever move the current piece into empty cells, so the only cells
+        that differ afterwards are those the piece was in before and is in after.
+
+        Returns:
+            Any: The (y, x, value) of each cell the current piece is in.
+        """
+
+        if not self.piece:
+            return ()
+
+        board = self.board
+
+        return [(y, x, board[y][x]) for y, x in self.piece.cells()]
+
+    def _restore_cells(self, saved: Any) -> None:
+        """Restores the cells saved by _save_cells(), emptying those the current piece
+        has moved into since.
+
+        Args:
+            saved (Any): What _save_cells() returned.
+        """
+
+        if not self.piece:
+            return
+
+        board = self.board
+        cells = self.piece.cells()
+
+        if self._journal is not None:
+            self._record(cells)
+            self._record([(y, x) for y, x, _ in saved])
+
+        for y, x in cells:
+            board[y][x] = None
+        for y, x, value in saved:
+            board[y][x] = value
+
+    @contextmanager
+    def applied(self, actions: Sequence[Action]) -> Iterator["Board"]:
+        """Applies the sequence of actions for the duration of a with block.
+
+        Args:
+            actions (Sequence[Action]): The actions to perform.
+
+        Yields:
+            Iterator[Board]: This board with the actions applied.
+        """
+
+        self.push_actions(actions)
+        try:
+            yield self
+        finally:
+            self.pop()
+
+    def enumerate_placements(self) -> list["Placement"]:
+        """Finds every position the current piece can come to rest in, together with
+           the shortest sequence of actions that gets it there.
+
+        Returns:
+            list[Placement]: The unique placements, in order of the number of actions needed.
+        """
+
+        from tetris.search import enumerate_placements
+
+        return enumerate_placements(self)
+
     def __getitem__(self, y):
         """Accesses board rows."""
 
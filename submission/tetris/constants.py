@@ -2,8 +2,13 @@ from typing import Dict, Sequence, Tuple
 
 BoardState = list[list[str | None]]
 Cell = Tuple[int, int]
+PieceState = Tuple[int, int, int, bool]  # (x, y, orientation, landed)
+PieceKey = Tuple[str, int, int, int]  # (piece type, x, y, orientation)
 
 LINE_CLEAR_SCORES: Dict[int, int] = {1: 100, 2: 250, 3: 750, 4: 3000}
 
 BOARD_WIDTH: int = 10
 BOARD_HEIGHT: int = 21
+
+# Default time budget for an agent to decide each move, in seconds
+MOVE_TIME: float = 0.1
@@ -0,0 +1,108 @@
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+from tetris.constants import BOARD_WIDTH
+
+# The columns of the matrix returned by extract()
+FEATURE_NAMES: Tuple[str, ...] = (
+    *(f"height_{x}" for x in range(BOARD_WIDTH)),
+    "aggregate_height",
+    "max_height",
+    "holes",
+    "wells",
+    "bumpiness",
+    "row_transitions",
+    "column_transitions",
+)
+
+HEIGHTS = slice(0, BOARD_WIDTH)
+AGGREGATE_HEIGHT = FEATURE_NAMES.index("aggregate_height")
+MAX_HEIGHT = FEATURE_NAMES.index("max_height")
+HOLES = FEATURE_NAMES.index("holes")
+WELLS = FEATURE_NAMES.index("wells")
+BUMPINESS = FEATURE_NAMES.index("bumpiness")
+ROW_TRANSITIONS = FEATURE_NAMES.index("row_transitions")
+COLUMN_TRANSITIONS = FEATURE_NAMES.index("column_transitions")
+
+_COLUMN_BITS = np.arange(BOARD_WIDTH, dtype=np.int64)
+
+
+def filled_cells(boards: Union[np.ndarray, Sequence[Sequence[int]]]) -> np.ndarray:
+    """Converts a batch of boards to a boolean array of which cells are filled.
+
+    Args:
+        boards (Union[np.ndarray, Sequence[Sequence[int]]]): Either an (N, height,
+            width) array of cells, where any non-zero value is filled (such as
+            VecTetrisEnv.boards), or row bitmasks as an (N, height) integer array or a
+            sequence of rows per board (such as search.place() results or BitBoard.copy()).
+
+    Returns:
+        np.ndarray: An (N, height, width) boolean array.
+    """
+
+    boards = np.asarray(boards)
+
+    if boards.ndim == 3:
+        return boards != 0
+
+    if boards.ndim == 2:
+        return (boards.astype(np.int64)[:, :, None] >> _COLUMN_BITS & 1).astype(bool)
+
+    raise ValueError(
+        f"Expected an (N, height, width) array of cells or (N, height) array of row masks, got shape {boards.shape}."
+    )
+
+
+def extract(boards: Union[np.ndarray, Sequence[Sequence[int]]]) -> np.ndarray:
+    """Computes the heuristic features of a batch of boards at once.
+
+    Every row of the boards is included, so the buffer row above the board adds a
+    constant 2 row transitions while it is empty.
+
+    Args:
+        boards (Union[np.ndarray, Sequence[Sequence[int]]]): The boards, in any format
+            accepted by filled_cells().
+
+    Returns:
+        np.ndarray: An (N, F) int64 matrix with a column per name in FEATURE_NAMES:
+        the height of each column, their sum and maximum, the number of empty cells
+        below a filled cell, the total depth of wells (columns lower than both
+        neighbours, with the walls counting as full height), the sum of the height
+        differences between neighbouring columns, and the number of changes between
+        filled and empty cells along the rows and down the columns (with the walls
+        and floor counting as filled).
+    """
+
+    filled = filled_cells(boards)
+    count, height, width = filled.shape
+
+    features = np.empty((count, len(FEATURE_NAMES)), dtype=np.int64)
+
+    # Rows are numbered from the top, so the first filled cell gives the height
+    heights = np.where(filled.any(axis=1), height - filled.argmax(axis=1), 0)
+    features[:, HEIGHTS] = heights
+    features[:, AGGREGATE_HEIGHT] = heights.sum(axis=1)
+    features[:, MAX_HEIGHT] = heights.max(axis=1)
+
+    covered = np.logical_or.accumulate(filled, axis=1)
+    features[:, HOLES] = (covered & ~filled).sum(axis=(1, 2))
+
+    walls = np.full((count, 1), height)
+    padded = np.concatenate((walls, heights, walls), axis=1)
+    depths = np.minimum(padded[:, :-2], padded[:, 2:]) - heights
+    features[:, WELLS] = np.maximum(depths, 0).sum(axis=1)
+
+    features[:, BUMPINESS] = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+
+    sides = np.ones((count, height, 1), dtype=bool)
+    rows = np.concatenate((sides, filled, sides), axis=2)
+    features[:, ROW_TRANSITIONS] = (rows[:, :, 1:] != rows[:, :, :-1]).sum(axis=(1, 2))
+
+    floor = np.ones((count, 1, width), dtype=bool)
+    columns = np.concatenate((filled, floor), axis=1)
+    features[:, COLUMN_TRANSITIONS] = (columns[:, 1:] != columns[:, :-1]).sum(
+        axis=(1, 2)
+    )
+
+    return features
@@ -1,22 +1,47 @@
 import random
+import time
 from typing import AsyncGenerator, Generator, Optional, Sequence, Tuple
 
+from tetris import metrics
 from tetris.agent import BaseAgent
 from tetris.board import Action, Board
+from tetris.constants import MOVE_TIME
 from tetris.piece import Piece
 from tetris.pieces import PIECES
 
+# The number of pieces dealt in a game
+GAME_LENGTH = 1000
+
+
+def piece_sequence(seed: int = -1) -> list[int]:
+    """Generates the indices into PIECES of the pieces dealt in a game.
+
+    Args:
+        seed (int, optional): The seed of the game, or -1 for a random game. Defaults to -1.
+
+    Returns:
+        list[int]: The index of each piece in the order they are dealt.
+    """
+
+    random_generator = random.Random(None if seed == -1 else seed)
+
+    return random_generator.choices(range(len(PIECES)), k=GAME_LENGTH)
+
 
 class Game:
     agent: BaseAgent
     seed: int
+    move_time: float
     score: int
     running: bool
     board: Board
 
-    def __init__(self, agent: BaseAgent, seed: int = -1) -> None:
+    def __init__(
+        self, agent: BaseAgent, seed: int = -1, move_time: float = MOVE_TIME
+    ) -> None:
         self.agent = agent
         self.seed = seed
+        self.move_time = move_time
 
         self.score = 0
         self.running = True
@@ -29,10 +54,7 @@ class Game:
             Generator[Piece, None, None]: An instance of the next generated piece in the game.
         """
 
-        random_generator = random.Random(None if self.seed == -1 else self.seed)
-        pieces = random_generator.choices(range(7), k=1000)
-
-        for piece in pieces:
+        for piece in piece_sequence(self.seed):
             if not self.running:
                 return
 
@@ -64,68 +86,96 @@ class Game:
                 The action taken if any.
         """
 
-        # Make a copy of the board at this point for comparision
-        old_board = self.board.copy()
+        self.agent.setup()
+
+        try:
+
+            # Record changes to the board from this point on
+            self.board.track_changes()
 
-        for piece in self.generate_pieces():
-            # Set the new piece to be the current one and spawn it
-            self.board.set_piece(piece)
-            if not self.board.spawn_piece():
-                self.running = False
-                if changes := self.board.get_changes(old_board):
+            # Latency histograms are only recorded if enabled through TETRIS_METRICS
+            timed = metrics.ENABLED
+
+            for piece in self.generate_pieces():
+                # Set the new piece to be the current one and spawn it
+                self.board.set_piece(piece)
+                if not self.board.spawn_piece():
+                    self.running = False
+                    if changes := self.board.drain_changes():
+                        yield changes, None, self.board, None
+
+                    return
+
+                while not piece.landed:
+                    # Get board differences
+                    changes = self.board.drain_changes()
+
+                    # This yield updates the new piece spawning
                     yield changes, None, self.board, None
 
-                return
+                    # Wait for agent to make a number of moves
+                    if timed:
+                        started = time.perf_counter_ns()
 
-            while not piece.landed:
-                # Get board differences
-                changes = self.board.get_changes(old_board)
+                    actions = await self.agent.play_move_with_deadline(
+                        self.board, time.perf_counter() + self.move_time
+                    )
 
-                # This yield updates the new piece spawning
-                yield changes, None, self.board, None
+                    if timed:
+                        decided = time.perf_counter_ns()
+                        metrics.record("game.agent", decided - started)
 
-                # Wait for agent to make a number of moves
-                actions = await self.agent.play_move(self.board)
-                if isinstance(actions, Action):
-                    actions = [actions]
+                    if isinstance(actions, Action):
+                        actions = [actions]
 
-                # Reset the previous board to the current
-                old_board = self.board.copy()
+                    # Discard any changes the agent made to the board while deciding
+                    self.board.drain_changes()
 
-                # Set action to NOOP if empty list is returned from agent
-                if not actions:
-                    self.board.apply_action(Action.NOOP)
+                    # Set action to NOOP if empty list is returned from agent
+                    if not actions:
+                        self.board.apply_action(Action.NOOP)
 
-                # Perform the action
-                for action in actions:
-                    self.board.apply_action(action)
+                    # Perform the action
+                    for action in actions:
+                        self.board.apply_action(action)
 
-                    if self.board.piece.landed:
-                        break
+                        if self.board.piece.landed:
+                            break
 
-                # Yield the changes to the board once the current action has taken place
-                # Deals with cases of repeated movement into corner or hard drop when just above another piece
-                # Moves are yielded regardless so that they are still recorded
-                changes = self.board.get_changes(old_board)
-                yield changes, None, self.board, actions
+                    # Yield the changes to the board once the current action has taken place
+                    # Deals with cases of repeated movement into corner or hard drop when just above another piece
+                    # Moves are yielded regardless so that they are still recorded
+                    changes = self.board.drain_changes()
 
-                if changes:
-                    old_board = self.board.copy()
+                    if timed:
+                        metrics.record("game.engine", time.perf_counter_ns() - decided)
 
-            # Get indices of lines to clear
-            lines_to_clear = self.board.find_lines_to_clear()
+                    yield changes, None, self.board, actions
 
-            if lines_to_clear:
-                # Clear the lines, yield the change, and reset previous board to current
-                self.score += self.board.clear_lines(lines_to_clear)
+                # Get indices of lines to clear
+                lines_to_clear = self.board.find_lines_to_clear()
 
-                yield None, lines_to_clear, self.board, None
-                old_board = self.board.copy()
+                if lines_to_clear:
+                    # Clear the lines, yield the change, and reset the change journal
+                    if timed:
+                        started = time.perf_counter_ns()
 
-            # Update the running state of the game
-            self.running = self.board.is_game_running()
+                    self.score += self.board.clear_lines(lines_to_clear)
 
-            # If the game is not running but there is one last change, yield it
-            # In the case of a piece moving/rotating right at the end
-            if not self.running and (changes := self.board.get_changes(old_board)):
-                yield changes, None, self.board, None
+                    if timed:
+                        metrics.record(
+                            "game.clear_lines", time.perf_counter_ns() - started
+                        )
+
+                    yield None, lines_to_clear, self.board, None
+                    self.board.drain_changes()
+
+                # Update the running state of the game
+                self.running = self.board.is_game_running()
+
+                # If the game is not running but there is one last change, yield it
+                # In the case of a piece moving/rotating right at the end
+                if not self.running and (changes := self.board.drain_changes()):
+                    yield changes, None, self.board, None
+        finally:
+            self.agent.teardown()
@@ -0,0 +1,192 @@
+import atexit
+import json
+import os
+from typing import Dict, Optional
+
+# Set to a file path to record latency histograms and write them there at exit. The
+# path may contain {pid} so that each process writes its own file.
+METRICS_ENVIRONMENT_VARIABLE = "TETRIS_METRICS"
+
+METRICS_PATH: Optional[str] = os.environ.get(METRICS_ENVIRONMENT_VARIABLE) or None
+
+# Checked before taking any timings, so that instrumentation costs nothing when off
+ENABLED: bool = METRICS_PATH is not None
+
+# Each power of two is split into this many buckets, bounding the error of any
+# recorded value to 1/32 (about 3%)
+SUB_BUCKET_BITS = 5
+
+
+class Histogram:
+    """A histogram of durations in nanoseconds with log-linear buckets, in the style of
+    HdrHistogram: recording a value is a couple of integer operations and a dict
+    update, and memory is bounded by the range of values rather than their number."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    @staticmethod
+    def bucket(value: int) -> int:
+        """Gets the index of the bucket a value falls into.
+
+        Args:
+            value (int): A non-negative value.
+
+        Returns:
+            int: The bucket index, which increases with the value.
+        """
+
+        exponent = max(value.bit_length() - SUB_BUCKET_BITS - 1, 0)
+
+        return (exponent << SUB_BUCKET_BITS) + (value >> exponent)
+
+    @staticmethod
+    def bucket_value(index: int) -> int:
+        """Gets the value in the middle of a bucket.
+
+        Args:
+            index (int): The bucket index.
+
+        Returns:
+            int: The value representing the bucket.
+        """
+
+        exponent = max((index >> SUB_BUCKET_BITS) - 1, 0)
+        mantissa = index - (exponent << SUB_BUCKET_BITS)
+
+        return (mantissa << exponent) + ((1 << exponent) >> 1)
+
+    def record(self, value: int) -> None:
+        """Records a value.
+
+        Args:
+            value (int): The value, in nanoseconds.
+        """
+
+        index = self.bucket(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+
+        if not self.count or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: "Histogram") -> None:
+        """Adds the values recorded by another histogram to this one.
+
+        Args:
+            other (Histogram): The histogram to add.
+        """
+
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+
+        if other.count and (not self.count or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, q: float) -> int:
+        """Gets the value below which a percentage of the recorded values fall.
+
+        Args:
+            q (float): The percentile, between 0 and 100.
+
+        Returns:
+            int: The value, accurate to the bucket size, or 0 if nothing was recorded.
+        """
+
+        if not self.count:
+            return 0
+
+        target = self.count * q / 100
+        seen = 0
+
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+
+            if seen >= target:
+                return min(max(self.bucket_value(index), self.min), self.max)
+
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        """Summarises the histogram in microseconds.
+
+        Returns:
+            dict[str, float]: The count, mean, min, max and percentiles.
+        """
+
+        summary: dict[str, float] = {
+            "count": self.count,
+            "mean_us": self.total / self.count / 1000 if self.count else 0.0,
+            "min_us": self.min / 1000,
+        }
+
+        for q in (50, 90, 99, 99.9):
+            summary[f"p{q:g}_us"] = self.percentile(q) / 1000
+
+        summary["max_us"] = self.max / 1000
+
+        return summary
+
+
+histograms: Dict[str, Histogram] = {}
+
+
+def record(name: str, value: int) -> None:
+    """Records a duration in the named histogram.
+
+    Args:
+        name (str): The name of what was timed.
+        value (int): The duration, in nanoseconds.
+    """
+
+    histogram = histograms.get(name)
+    if histogram is None:
+        histogram = histograms[name] = Histogram()
+
+    histogram.record(value)
+
+
+def dump(path: Optional[str] = None) -> None:
+    """Writes a summary and the buckets of every histogram to a JSON file.
+
+    Args:
+        path (Optional[str], optional): The file to write. Defaults to the path in TETRIS_METRICS.
+    """
+
+    path = path or METRICS_PATH
+    if not path or not histograms:
+        return
+
+    with open(path.format(pid=os.getpid()), "w") as f:
+        json.dump(
+            {
+                name: {
+                    **histogram.summary(),
+                    "buckets": [
+                        [Histogram.bucket_value(index), histogram.counts[index]]
+                        for index in sorted(histogram.counts)
+                    ],
+                }
+                for name, histogram in sorted(histograms.items())
+            },
+            f,
+            indent=2,
+        )
+
+
+if ENABLED:
+    atexit.register(dump)
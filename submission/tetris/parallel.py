@@ -0,0 +1,154 @@
+import math
+import multiprocessing
+import os
+import time
+from multiprocessing.pool import Pool
+from typing import Any, Callable, Generic, Optional, Sequence, TypeVar
+
+S = TypeVar("S")
+C = TypeVar("C")
+R = TypeVar("R")
+
+# The function evaluating candidates in a worker process, inherited when it is forked
+_function: Optional[Callable[[Any, Any], Any]] = None
+
+
+def _initialise(function: Callable[[Any, Any], Any]) -> None:
+    global _function
+    _function = function
+
+
+def _evaluate(snapshot: Any, candidates: Sequence[Any], deadline: float) -> list[Any]:
+    """Evaluates candidates in order until the deadline passes.
+
+    Args:
+        snapshot (Any): The state the candidates are evaluated in.
+        candidates (Sequence[Any]): The candidates.
+        deadline (float): The time.perf_counter() value at which to stop.
+
+    Returns:
+        list[Any]: The result for each candidate evaluated, which may not be all of them.
+    """
+
+    assert _function is not None
+
+    results = []
+    for candidate in candidates:
+        if time.perf_counter() >= deadline:
+            break
+
+        results.append(_function(snapshot, candidate))
+
+    return results
+
+
+class ParallelSearch(Generic[S, C, R]):
+    """Evaluates the candidates of a single decision (e.g. the placements of the
+    current piece) across a persistent pool of worker processes.
+
+    The workers are forked once, by start(), and each inherits a copy of the
+    evaluation function along with everything it refers to (such as the agent and
+    its caches), so only a compact snapshot of the state (such as the board's row
+    bitmasks) and the candidates are sent with each decision. The calling process
+    evaluates a share of the candidates too, and results that are not back by the
+    deadline are left out.
+
+    Agents should call start() from BaseAgent.setup(), which the game runner calls on
+    INIT, so that no process is started while a move is being timed. On a single CPU,
+    no workers are started and everything is evaluated in the calling process.
+    """
+
+    def __init__(
+        self, function: Callable[[S, C], R], workers: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            function (Callable[[S, C], R]): Evaluates a candidate given the snapshot.
+            workers (Optional[int], optional): The number of worker processes. Defaults to one less than the number of CPUs.
+        """
+
+        self.function = function
+        self.workers = (os.cpu_count() or 1) - 1 if workers is None else workers
+        self.pool: Optional[Pool] = None
+
+    def start(self) -> None:
+        """Forks the worker processes, if they have not been started already."""
+
+        if self.pool is not None or self.workers <= 0:
+            return
+
+        # Forking lets the workers inherit the function without pickling it
+        context = multiprocessing.get_context(
+            "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        )
+        self.pool = context.Pool(self.workers, _initialise, (self.function,))
+
+    def close(self) -> None:
+        """Stops the worker processes."""
+
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def map(
+        self, snapshot: S, candidates: Sequence[C], deadline: float
+    ) -> list[Optional[R]]:
+        """Evaluates candidates in parallel.
+
+        Candidates are taken in order, so if they are ordered best first, the most
+        promising ones are evaluated first. Any that have not been started by the
+        deadline are skipped.
+
+        Args:
+            snapshot (S): The state the candidates are evaluated in, which is pickled.
+            candidates (Sequence[C]): The candidates, which are pickled.
+            deadline (float): The time.perf_counter() value by which to return.
+
+        Returns:
+            list[Optional[R]]: The result for each candidate, or None if it was not
+            evaluated in time.
+        """
+
+        if not candidates:
+            return []
+
+        self.start()
+
+        # The calling process takes every (workers + 1)th candidate, and the rest are
+        # sent to the pool one at a time so that whichever worker is free takes the
+        # next and each result comes back as soon as it is ready
+        shares = self.workers + 1
+        pending = []
+        for index, candidate in enumerate(candidates):
+            if index % shares:
+                assert self.pool is not None
+                pending.append(
+                    (
+                        index,
+                        self.pool.apply_async(
+                            _evaluate, (snapshot, (candidate,), deadline)
+                        ),
+                    )
+                )
+
+        results: list[Optional[R]] = [None] * len(candidates)
+
+        for index in range(0, len(candidates), shares):
+            if time.perf_counter() >= deadline:
+                break
+
+            results[index] = self.function(snapshot, candidates[index])
+
+        for index, result in pending:
+            timeout = deadline - time.perf_counter()
+
+            try:
+                values = result.get(None if math.isinf(timeout) else max(timeout, 0.0))
+            except multiprocessing.TimeoutError:
+                continue
+
+            if values:
+                results[index] = values[0]
+
+        return results
@@ -1,17 +1,286 @@
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import Any, Callable, Optional, Sequence, Tuple
 
-from tetris.constants import BoardState, Cell
+from tetris.constants import BOARD_HEIGHT, BOARD_WIDTH, BoardState, Cell, PieceKey
+
+# Vacated and newly occupied cells of a move from a given position, or None if the
+# piece would leave the board
+Move = Optional[Tuple[Tuple[Cell, ...], Tuple[Cell, ...]]]
+
+# The orientation, y and x after a rotation from a given position (including any
+# kick back inside the board), followed by the vacated and newly occupied cells
+Rotation = Tuple[int, int, int, Tuple[Cell, ...], Tuple[Cell, ...]]
+
+# Tables indexed by [orientation][y][x]
+MoveTable = Tuple[Tuple[Tuple[Move, ...], ...], ...]
+RotationTable = Tuple[Tuple[Tuple[Optional[Rotation], ...], ...], ...]
+
+# The (column, floor) of each column the piece covers, indexed by [orientation][x],
+# where floor is the y coordinate the piece would have if it landed on the floor of
+# that column. Empty if the piece does not fit at x.
+DropTable = Tuple[Tuple[Tuple[Tuple[int, int], ...], ...], ...]
 
 
 class Piece:
+    """A Tetris piece, whose moves are driven by its geometry tables.
+
+    Subclasses define CELLS (the (dy, dx) offsets of each cell from the piece's
+    position in each orientation) and the (dy, dx) position shifts applied when
+    rotating out of each orientation. A rotation that would leave the board is kicked
+    back inside it along the axis that overflows. Every move from every position is
+    precomputed from these tables when the subclass is created.
+
+    Instances only hold their position, orientation and landed state, in slots, so
+    they are small and quick to create and copy. Subclasses must declare empty
+    __slots__ to keep it that way.
+    """
+
+    __slots__ = ("x", "y", "orientation", "landed")
+
     piece_type = "N"
 
+    CELLS: Tuple[Tuple[Cell, ...], ...] = ()
+    CLOCKWISE_SHIFTS: Tuple[Cell, ...] = ()
+    ANTICLOCKWISE_SHIFTS: Tuple[Cell, ...] = ()
+
+    # Derived tables, indexed by orientation
+    BOUNDS: Tuple[Tuple[int, int, int, int], ...]  # (min_dy, max_dy, min_dx, max_dx)
+    BOTTOMS: Tuple[Tuple[Cell, ...], ...]  # Cells with no cell of the piece below
+
+    _LEFT: MoveTable
+    _RIGHT: MoveTable
+    _FALL: MoveTable
+    _CLOCKWISE: RotationTable
+    _ANTICLOCKWISE: RotationTable
+    _DROPS: DropTable
+
+    def __init_subclass__(cls) -> None:
+        super().__init_subclass__()
+
+        cls.BOUNDS = tuple(
+            (
+                min(dy for dy, _ in cells),
+                max(dy for dy, _ in cells),
+                min(dx for _, dx in cells),
+                max(dx for _, dx in cells),
+            )
+            for cells in cls.CELLS
+        )
+        cls.BOTTOMS = tuple(
+            tuple(cell for cell in cells if (cell[0] + 1, cell[1]) not in cells)
+            for cells in cls.CELLS
+        )
+
+        cls._LEFT = cls._table(lambda o, y, x: cls._move(o, y, x, o, y, x - 1))
+        cls._RIGHT = cls._table(lambda o, y, x: cls._move(o, y, x, o, y, x + 1))
+        cls._FALL = cls._table(lambda o, y, x: cls._move(o, y, x, o, y + 1, x))
+        cls._CLOCKWISE = cls._table(
+            lambda o, y, x: cls._rotation(o, y, x, cls.CLOCKWISE_SHIFTS, 1)
+        )
+        cls._ANTICLOCKWISE = cls._table(
+            lambda o, y, x: cls._rotation(o, y, x, cls.ANTICLOCKWISE_SHIFTS, -1)
+        )
+        cls._DROPS = tuple(
+            tuple(
+                (
+                    tuple((x + dx, BOARD_HEIGHT - 1 - dy) for dy, dx in bottoms)
+                    if 0 <= x + min_dx and x + max_dx < BOARD_WIDTH
+                    else ()
+                )
+                for x in range(BOARD_WIDTH)
+            )
+            for bottoms, (_, _, min_dx, max_dx) in zip(cls.BOTTOMS, cls.BOUNDS)
+        )
+
+    @classmethod
+    def _table(cls, entry: Callable[[int, int, int], Any]) -> Tuple:
+        return tuple(
+            tuple(
+                tuple(entry(o, y, x) for x in range(BOARD_WIDTH))
+                for y in range(BOARD_HEIGHT)
+            )
+            for o in range(len(cls.CELLS))
+        )
+
+    @classmethod
+    def fits(cls, orientation: int, y: int, x: int) -> bool:
+        """Checks whether the piece lies within the board at the given position.
+
+        Args:
+            orientation (int): The orientation of the piece.
+            y (int): The y coordinate of the piece.
+            x (int): The x coordinate of the piece.
+
+        Returns:
+            bool: True if all of the piece's cells are on the board else False.
+        """
+
+        min_dy, max_dy, min_dx, max_dx = cls.BOUNDS[orientation]
+
+        return (
+            0 <= y + min_dy
+            and y + max_dy < BOARD_HEIGHT
+            and 0 <= x + min_dx
+            and x + max_dx < BOARD_WIDTH
+        )
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def _deltas(
+        cls, orientation: int, new_orientation: int, dy: int, dx: int
+    ) -> Tuple[Tuple[Cell, ...], Tuple[Cell, ...]]:
+        """Gets the cells vacated and newly occupied when the piece rotates and moves.
+
+        Args:
+            orientation (int): The orientation before the move.
+            new_orientation (int): The orientation after the move.
+            dy (int): The change in the piece's y coordinate.
+            dx (int): The change in the piece's x coordinate.
+
+        Returns:
+            Tuple[Tuple[Cell, ...], Tuple[Cell, ...]]: The (old, new) cell offsets relative to the starting position.
+        """
+
+        before = cls.CELLS[orientation]
+        after = tuple((y + dy, x + dx) for y, x in cls.CELLS[new_orientation])
+
+        return (
+            tuple(cell for cell in before if cell not in after),
+            tuple(cell for cell in after if cell not in before),
+        )
+
+    @classmethod
+    def _move(
+        cls,
+        orientation: int,
+        y: int,
+        x: int,
+        new_orientation: int,
+        new_y: int,
+        new_x: int,
+    ) -> Move:
+        if not (
+            cls.fits(orientation, y, x) and cls.fits(new_orientation, new_y, new_x)
+        ):
+            return None
+
+        old, new = cls._deltas(orientation, new_orientation, new_y - y, new_x - x)
+
+        return (
+            tuple((y + dy, x + dx) for dy, dx in old),
+            tuple((y + dy, x + dx) for dy, dx in new),
+        )
+
+    @classmethod
+    def _rotation(
+        cls, orientation: int, y: int, x: int, shifts: Tuple[Cell, ...], step: int
+    ) -> Optional[Rotation]:
+        new_orientation = (orientation + step) % len(cls.CELLS)
+        shift_y, shift_x = shifts[orientation] if shifts else (0, 0)
+        min_dy, max_dy, min_dx, max_dx = cls.BOUNDS[new_orientation]
+
+        # Kick the rotated piece back inside the board if it overflows an edge
+        new_y = min(max(y + shift_y, -min_dy), BOARD_HEIGHT - 1 - max_dy)
+        new_x = min(max(x + shift_x, -min_dx), BOARD_WIDTH - 1 - max_dx)
+
+        move = cls._move(orientation, y, x, new_orientation, new_y, new_x)
+        if not move or not move[1]:
+            return None
+
+        return (new_orientation, new_y, new_x, *move)
+
+    @classmethod
+    def drop_distance(
+        cls, orientation: int, y: int, x: int, heights: Sequence[int]
+    ) -> Optional[int]:
+        """Computes how many rows the piece can fall from the column heights.
+
+        Args:
+            orientation (int): The orientation of the piece.
+            y (int): The y coordinate of the piece.
+            x (int): The x coordinate of the piece.
+            heights (Sequence[int]): The height of the stack in each column, not counting the piece.
+
+        Returns:
+            Optional[int]: The number of rows, or None if the piece is below the top of
+            the stack in one of its columns (e.g. tucked under an overhang) or does not
+            fit on the board at x.
+        """
+
+        drops = cls._DROPS[orientation][x]
+        if not drops:
+            return None
+
+        distance = BOARD_HEIGHT
+        for column, floor in drops:
+            gap = floor - heights[column]
+            if gap < distance:
+                distance = gap
+
+        distance -= y
+
+        return distance if distance >= 0 else None
+
+    @classmethod
+    def rotated(
+        cls, orientation: int, y: int, x: int, clockwise: bool
+    ) -> Optional[Tuple[int, int, int]]:
+        """Gets where the piece ends up when rotated, ignoring the other cells on the board.
+
+        Args:
+            orientation (int): The orientation of the piece.
+            y (int): The y coordinate of the piece.
+            x (int): The x coordinate of the piece.
+            clockwise (bool): Whether to rotate clockwise or anticlockwise.
+
+        Returns:
+            Optional[Tuple[int, int, int]]: The new (orientation, y, x), or None if the piece cannot rotate.
+        """
+
+        table = cls._CLOCKWISE if clockwise else cls._ANTICLOCKWISE
+        rotation = table[orientation][y][x]
+
+        return rotation[:3] if rotation else None
+
     def __init__(self) -> None:
         self.x = -1
         self.y = -1
         self.orientation = 0
         self.landed = False
 
+    def clone(self) -> "Piece":
+        """Copies the piece's position, orientation and landed state.
+
+        Returns:
+            Piece: A new piece of the same type in the same state.
+        """
+
+        piece = self.__class__.__new__(self.__class__)
+        piece.x = self.x
+        piece.y = self.y
+        piece.orientation = self.orientation
+        piece.landed = self.landed
+
+        return piece
+
+    def key(self) -> PieceKey:
+        """Packs the piece's type, position and orientation into a hashable tuple.
+
+        Returns:
+            PieceKey: The (piece type, x, y, orientation) of the piece.
+        """
+
+        return self.piece_type, self.x, self.y, self.orientation
+
+    def cells(self) -> list[Cell]:
+        """Gets the cells currently occupied by this piece.
+
+        Returns:
+            list[Cell]: list of cells occupied by the piece in the form (y, x)
+        """
+
+        return [(self.y + dy, self.x + dx) for dy, dx in self.CELLS[self.orientation]]
+
     def spawn_piece(self) -> list[Cell]:
         """Gets the cells of where this piece will spawn.
 
@@ -19,7 +288,7 @@ class Piece:
             list[Cell]: list of cells where this piece will spawn in the form (y, x)
         """
 
-        raise NotImplementedError
+        return self.cells()
 
     def move_left(
         self, board: BoardState
@@ -34,7 +303,18 @@ class Piece:
             Lists of old and new piece locations after the move in the form ([(old_y1, old_x1), ...], [(new_y1, new_x1), ...]).
         """
 
-        raise NotImplementedError
+        move = self._LEFT[self.orientation][self.y][self.x]
+        if not move:
+            return None, None
+
+        old, new = move
+        for y, x in new:
+            if board[y][x]:
+                return None, None
+
+        self.x -= 1
+
+        return list(old), list(new)
 
     def move_right(
         self, board: BoardState
@@ -49,7 +329,33 @@ class Piece:
             Lists of old and new piece locations after the move in the form ([(old_y1, old_x1), ...], [(new_y1, new_x1), ...]).
         """
 
-        raise NotImplementedError
+        move = self._RIGHT[self.orientation][self.y][self.x]
+        if not move:
+            return None, None
+
+        old, new = move
+        for y, x in new:
+            if board[y][x]:
+                return None, None
+
+        self.x += 1
+
+        return list(old), list(new)
+
+    def _rotate(
+        self, board: BoardState, rotation: Optional[Rotation]
+    ) -> Tuple[Optional[list[Cell]], Optional[list[Cell]]]:
+        if not rotation:
+            return None, None
+
+        orientation, y, x, old, new = rotation
+        for cy, cx in new:
+            if board[cy][cx]:
+                return None, None
+
+        self.orientation, self.y, self.x = orientation, y, x
+
+        return list(old), list(new)
 
     def rotate_clockwise(
         self, board: BoardState
@@ -64,7 +370,7 @@ class Piece:
             Lists of old and new piece locations after the rotation in the form ([(old_y1, old_x1), ...], [(new_y1, new_x1), ...]).
         """
 
-        raise NotImplementedError
+        return self._rotate(board, self._CLOCKWISE[self.orientation][self.y][self.x])
 
     def rotate_anticlockwise(
         self, board: BoardState
@@ -79,7 +385,9 @@ class Piece:
             Lists of old and new piece locations after the rotation in the form ([(old_y1, old_x1), ...], [(new_y1, new_x1), ...]).
         """
 
-        raise NotImplementedError
+        return self._rotate(
+            board, self._ANTICLOCKWISE[self.orientation][self.y][self.x]
+        )
 
     def has_landed(self, board: BoardState) -> bool:
         """Checks whether the piece has landed on the current board state.
@@ -91,7 +399,16 @@ class Piece:
             bool: True if the piece has landed else False.
         """
 
-        raise NotImplementedError
+        # The cells a fall moves into are those directly below the piece
+        fall = self._FALL[self.orientation][self.y][self.x]
+        if not fall:
+            return True
+
+        for y, x in fall[1]:
+            if board[y][x]:
+                return True
+
+        return False
 
     def fall(self) -> Tuple[list[Cell], list[Cell]]:
         """Gets the changed coordinates of the piece when it falls.
@@ -101,4 +418,11 @@ class Piece:
             Lists of old and new piece locations after the fall in the form ([(old_y1, old_x1), ...], [(new_y1, new_x1), ...]).
         """
 
-        raise NotImplementedError
+        fall = self._FALL[self.orientation][self.y][self.x]
+        if not fall:
+            raise RuntimeError("Piece cannot fall below the bottom of the board.")
+
+        old, new = fall
+        self.y += 1
+
+        return list(old), list(new)
@@ -0,0 +1,241 @@
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from tetris.board import Board
+from tetris.piece import Piece
+
+# Set to a file path to profile board operations and write the collapsed stacks
+# there at exit (a summary table is also printed to stderr). The path may contain
+# {pid} so that each process writes its own file.
+PROFILE_ENVIRONMENT_VARIABLE = "TETRIS_PROFILE"
+
+PROFILED_BOARD_METHODS: Tuple[str, ...] = (
+    "apply_action",
+    "with_moves",
+    "copy",
+    "clone",
+    "get_changes",
+    "drain_changes",
+    "clear_lines",
+    "update_board",
+    "hard_drop",
+    "push_actions",
+    "pop",
+    "enumerate_placements",
+)
+
+PROFILED_PIECE_METHODS: Tuple[str, ...] = (
+    "move_left",
+    "move_right",
+    "rotate_clockwise",
+    "rotate_anticlockwise",
+    "has_landed",
+    "fall",
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Stats for each call path: [calls, total nanoseconds, self nanoseconds]
+Stats = Dict[Tuple[str, ...], list[int]]
+
+
+class _ThreadState(threading.local):
+    def __init__(self) -> None:
+        self.frames: list[str] = []
+        self.children: list[int] = []
+        self.stats: Stats = {}
+
+        with _lock:
+            _thread_stats.append(self.stats)
+
+
+_lock = threading.Lock()
+_thread_stats: list[Stats] = []
+_state = _ThreadState()
+
+# The original methods replaced while profiling is enabled, by (class, name)
+_originals: Dict[Tuple[type, str], Callable[..., Any]] = {}
+
+
+def _timed(name: str, function: F) -> F:
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        state = _state
+        frames = state.frames
+        children = state.children
+
+        frames.append(name)
+        children.append(0)
+        start = time.perf_counter_ns()
+
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            path = tuple(frames)
+            child = children.pop()
+            frames.pop()
+
+            if children:
+                children[-1] += elapsed
+
+            stats = state.stats.get(path)
+            if stats is None:
+                stats = state.stats[path] = [0, 0, 0]
+
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] += elapsed - child
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _classes(base: type) -> list[type]:
+    classes = [base]
+    for subclass in base.__subclasses__():
+        classes.extend(_classes(subclass))
+
+    return classes
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def enable() -> None:
+    """Starts timing board and piece operations, by wrapping the methods of Board,
+    Piece and all of their subclasses defined so far. Code that is not being
+    profiled runs the original methods, with no overhead at all."""
+
+    if is_enabled():
+        return
+
+    for base, names in (
+        (Board, PROFILED_BOARD_METHODS),
+        (Piece, PROFILED_PIECE_METHODS),
+    ):
+        for cls in _classes(base):
+            for name in names:
+                if name in cls.__dict__:
+                    method = cls.__dict__[name]
+                    _originals[cls, name] = method
+                    setattr(cls, name, _timed(f"{cls.__name__}.{name}", method))
+
+
+def disable() -> None:
+    """Stops timing, restoring the original methods. Recorded stats are kept."""
+
+    for (cls, name), method in _originals.items():
+        setattr(cls, name, method)
+
+    _originals.clear()
+
+
+def profile(function: F) -> F:
+    """Decorates a function (e.g. an agent's evaluation function) so that it shows up
+    in the profile. If profiling is not enabled when the function is defined, the
+    function is returned as it is.
+
+    Args:
+        function (F): The function to time.
+
+    Returns:
+        F: The timed function.
+    """
+
+    if not is_enabled():
+        return function
+
+    return _timed(function.__qualname__, function)
+
+
+def stats() -> Stats:
+    """Gets the recorded stats of every call path, combined across threads.
+
+    Returns:
+        Stats: [calls, total nanoseconds, self nanoseconds] for each path of nested calls.
+    """
+
+    combined: Stats = {}
+
+    with _lock:
+        for thread_stats in _thread_stats:
+            for path, (calls, total, own) in list(thread_stats.items()):
+                entry = combined.setdefault(path, [0, 0, 0])
+                entry[0] += calls
+                entry[1] += total
+                entry[2] += own
+
+    return combined
+
+
+def collapsed_stacks() -> str:
+    """Formats the profile as collapsed stacks, which flame graph tools (e.g.
+    flamegraph.pl or speedscope) can read.
+
+    Returns:
+        str: A line per call path with its self time in microseconds.
+    """
+
+    return "".join(
+        f"{';'.join(path)} {own // 1000}\n"
+        for path, (_, _, own) in sorted(stats().items())
+        if own >= 1000
+    )
+
+
+def summary() -> str:
+    """Formats the profile as a table of calls and time per operation.
+
+    Returns:
+        str: The table, slowest operations (by self time) first.
+    """
+
+    totals: Dict[str, list[int]] = {}
+    for path, (calls, total, own) in stats().items():
+        entry = totals.setdefault(path[-1], [0, 0, 0])
+        entry[0] += calls
+        entry[2] += own
+
+        # Don't count time spent in recursive calls twice
+        if path[-1] not in path[:-1]:
+            entry[1] += total
+
+    lines = [
+        f"{'operation':<36} {'calls':>10} {'total ms':>10} {'self ms':>10} {'us/call':>8}"
+    ]
+    for name, (calls, total, own) in sorted(
+        totals.items(), key=lambda item: -item[1][2]
+    ):
+        lines.append(
+            f"{name:<36} {calls:>10} {total / 1e6:>10.1f} {own / 1e6:>10.1f} {total / calls / 1000:>8.2f}"
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+def dump(path: Optional[str] = None) -> None:
+    """Writes the collapsed stacks to a file and prints the summary table to stderr.
+
+    Args:
+        path (Optional[str], optional): The file to write. Defaults to the path in TETRIS_PROFILE.
+    """
+
+    path = path or os.environ.get(PROFILE_ENVIRONMENT_VARIABLE)
+    if not path:
+        return
+
+    with open(path.format(pid=os.getpid()), "w") as f:
+        f.write(collapsed_stacks())
+
+    sys.stderr.write(summary())
+
+
+if os.environ.get(PROFILE_ENVIRONMENT_VARIABLE):
+    enable()
+    atexit.register(dump)
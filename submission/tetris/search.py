@@ -0,0 +1,539 @@
+import atexit
+import os
+import pickle
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple, Type
+
+from tetris.bitboard import BitBoard
+from tetris.board import Action, Board
+from tetris.constants import BOARD_HEIGHT, BOARD_WIDTH, Cell
+from tetris.piece import Piece
+
+# (orientation, y, x)
+State = Tuple[int, int, int]
+
+# Actions other than HARD_DROP, each of which is followed by the piece falling a row
+STEP_ACTIONS: Tuple[Action, ...] = (
+    Action.MOVE_LEFT,
+    Action.MOVE_RIGHT,
+    Action.ROTATE_CLOCKWISE,
+    Action.ROTATE_ANTICLOCKWISE,
+    Action.NOOP,
+)
+
+FULL_ROW: int = (1 << BOARD_WIDTH) - 1
+
+# Set to a file path to load the placement cache from it on import and save it there
+# at exit, keeping it warm across games
+PLACEMENT_CACHE_ENVIRONMENT_VARIABLE = "TETRIS_PLACEMENT_CACHE"
+
+# Placements are rarely found again within a game, so the cache is kept small unless it
+# is persisted across games, where more of it gets reused
+PLACEMENT_CACHE_SIZE = 1024
+PERSISTENT_PLACEMENT_CACHE_SIZE = 1 << 14
+
+
+class Placement(NamedTuple):
+    """A final resting position of a piece and the shortest way of getting there."""
+
+    orientation: int
+    y: int
+    x: int
+    cells: Tuple[Cell, ...]
+    actions: Tuple[Action, ...]
+
+
+# (piece type, start state, the rows the search looked at)
+PlacementKey = Tuple[str, State, Tuple[int, ...]]
+
+
+def board_rows(board: Board) -> Tuple[int, ...]:
+    """Gets the board as row bitmasks, leaving out the cells of the current piece.
+
+    Args:
+        board (Board): The Tetris board.
+
+    Returns:
+        Tuple[int, ...]: A mask per row, where bit x is set if column x is filled.
+    """
+
+    if isinstance(board, BitBoard):
+        rows = [int(row) for row in board.board]
+    else:
+        rows = [
+            sum(1 << x for x, cell in enumerate(row) if cell) for row in board.board
+        ]
+
+    if board.piece:
+        for y, x in board.piece.cells():
+            rows[y] &= ~(1 << x)
+
+    return tuple(rows)
+
+
+def _is_free(rows: Sequence[int], cells: Tuple[Cell, ...]) -> bool:
+    for y, x in cells:
+        if rows[y] >> x & 1:
+            return False
+
+    return True
+
+
+def _step(
+    piece: Type[Piece], rows: Sequence[int], state: State, action: Action
+) -> Tuple[State, bool]:
+    """Applies a single action followed by a fall, following the rules of Board.apply_action.
+
+    Args:
+        piece (Type[Piece]): The type of piece being moved.
+        rows (Sequence[int]): The board as row bitmasks, without the piece.
+        state (State): The (orientation, y, x) of the piece.
+        action (Action): Any action other than HARD_DROP.
+
+    Returns:
+        Tuple[State, bool]: The new state of the piece and whether it has landed.
+    """
+
+    orientation, y, x = state
+
+    if action == Action.MOVE_LEFT or action == Action.MOVE_RIGHT:
+        table = piece._LEFT if action == Action.MOVE_LEFT else piece._RIGHT
+        move = table[orientation][y][x]
+
+        if move and _is_free(rows, move[1]):
+            x += -1 if action == Action.MOVE_LEFT else 1
+
+    elif action == Action.ROTATE_CLOCKWISE or action == Action.ROTATE_ANTICLOCKWISE:
+        table = (
+            piece._CLOCKWISE
+            if action == Action.ROTATE_CLOCKWISE
+            else piece._ANTICLOCKWISE
+        )
+        rotation = table[orientation][y][x]
+
+        if rotation and _is_free(rows, rotation[4]):
+            orientation, y, x = rotation[:3]
+
+    fall = piece._FALL[orientation][y][x]
+    if not fall or not _is_free(rows, fall[1]):
+        return (orientation, y, x), True
+
+    return (orientation, y + 1, x), False
+
+
+def _drop(
+    piece: Type[Piece],
+    rows: Sequence[int],
+    state: State,
+    heights: Optional[Sequence[int]] = None,
+) -> State:
+    """Drops the piece until it lands, following the rules of Action.HARD_DROP.
+
+    Args:
+        piece (Type[Piece]): The type of piece being dropped.
+        rows (Sequence[int]): The board as row bitmasks, without the piece.
+        state (State): The (orientation, y, x) of the piece.
+        heights (Optional[Sequence[int]], optional): The column heights of the rows, to
+            find where the piece lands without stepping down through them when it is
+            above the stack. Defaults to None.
+
+    Returns:
+        State: The state of the piece once it has landed.
+    """
+
+    orientation, y, x = state
+
+    if heights is not None:
+        distance = piece.drop_distance(orientation, y, x, heights)
+        if distance is not None:
+            return orientation, y + distance, x
+
+    falls = piece._FALL[orientation]
+
+    while True:
+        fall = falls[y][x]
+        if not fall or not _is_free(rows, fall[1]):
+            return orientation, y, x
+
+        y += 1
+
+
+class PlacementCache:
+    """A bounded cache of find_placements() results, evicting the least recently used
+    entry once full.
+
+    The search only ever looks at the rows of the board from the top down to just
+    below the lowest position it tried, which is the part of the stack near its
+    surface, so results are keyed by those rows alone. Boards that differ only
+    further down (e.g. in buried holes or in the rows below the surface) share
+    their results. Rows are compared as they are rather than relative to the
+    height of the stack, because the piece falls a row with every action, so how
+    far it is from the stack changes where it can get to.
+
+    If TETRIS_PLACEMENT_CACHE is set to a file path, the cache is loaded from it (if
+    it exists) on import and saved to it at exit, so that it stays warm across games.
+    """
+
+    def __init__(self, maxsize: int = PLACEMENT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.entries: OrderedDict[PlacementKey, Tuple[Placement, ...]] = OrderedDict()
+
+        # The number of entries with keys of each length, for each piece and start
+        self.lengths: Dict[Tuple[str, State], Dict[int, int]] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(
+        self, piece: Type[Piece], rows: Tuple[int, ...], start: State
+    ) -> Optional[Tuple[Placement, ...]]:
+        """Looks up the placements of a piece, marking them as recently used.
+
+        Args:
+            piece (Type[Piece]): The type of piece.
+            rows (Tuple[int, ...]): The board as row bitmasks, without the piece.
+            start (State): The (orientation, y, x) the piece starts from.
+
+        Returns:
+            Optional[Tuple[Placement, ...]]: The placements, or None if they are not cached.
+        """
+
+        lengths = self.lengths.get((piece.piece_type, start))
+
+        if lengths:
+            # The rows of a stored key always reach the stack (or the floor), so keys
+            # no longer than the empty rows above this stack cannot match
+            surface = next((y + 1 for y, row in enumerate(rows) if row), len(rows))
+
+            for length in lengths:
+                if length < surface:
+                    continue
+
+                key = (piece.piece_type, start, rows[:length])
+                placements = self.entries.get(key)
+
+                if placements is not None:
+                    self.hits += 1
+                    self.entries.move_to_end(key)
+                    return placements
+
+        self.misses += 1
+
+        return None
+
+    def put(
+        self,
+        piece: Type[Piece],
+        rows: Tuple[int, ...],
+        start: State,
+        placements: Tuple[Placement, ...],
+        length: int,
+    ) -> None:
+        """Stores the placements of a piece, evicting the least recently used entry if
+        the cache is full.
+
+        Args:
+            piece (Type[Piece]): The type of piece.
+            rows (Tuple[int, ...]): The board as row bitmasks, without the piece.
+            start (State): The (orientation, y, x) the piece starts from.
+            placements (Tuple[Placement, ...]): The placements found.
+            length (int): The number of rows from the top that the search looked at.
+        """
+
+        self._add((piece.piece_type, start, rows[:length]), placements)
+
+    def _add(self, key: PlacementKey, placements: Tuple[Placement, ...]) -> None:
+        if key not in self.entries:
+            lengths = self.lengths.setdefault(key[:2], {})
+            lengths[len(key[2])] = lengths.get(len(key[2]), 0) + 1
+
+        self.entries[key] = placements
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.maxsize:
+            piece_type, start, rows = self.entries.popitem(last=False)[0]
+            lengths = self.lengths[piece_type, start]
+
+            lengths[len(rows)] -= 1
+            if not lengths[len(rows)]:
+                del lengths[len(rows)]
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.lengths.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def save(self, path: str) -> None:
+        """Writes the cached placements to a file.
+
+        Args:
+            path (str): The file to write.
+        """
+
+        with open(path, "wb") as f:
+            pickle.dump(list(self.entries.items()), f)
+
+    def load(self, path: str) -> None:
+        """Adds the placements saved in a file to the cache.
+
+        Args:
+            path (str): The file written by save().
+        """
+
+        with open(path, "rb") as f:
+            for key, placements in pickle.load(f):
+                self._add(key, placements)
+
+
+def _search_placements(
+    piece: Type[Piece], rows: Tuple[int, ...], start: State
+) -> Tuple[Tuple[Placement, ...], int]:
+    """Finds every position the piece can come to rest in with a breadth-first search
+       over (orientation, y, x) states.
+
+    Args:
+        piece (Type[Piece]): The type of piece to place.
+        rows (Tuple[int, ...]): The board as row bitmasks, without the piece.
+        start (State): The (orientation, y, x) the piece starts from.
+
+    Returns:
+        Tuple[Tuple[Placement, ...], int]: The unique placements, in order of the
+        number of actions needed, and the number of rows from the top of the board
+        that the search looked at.
+    """
+
+    placements: dict[frozenset[Cell], Placement] = {}
+    heights = column_heights(rows)
+
+    # The lowest row of any position tried: from each state, the piece may fall a row,
+    # or rotate to a lower position (and then fall) when it is kicked off an edge
+    deepest = 0
+
+    def bottom(state: State) -> int:
+        orientation, y, x = state
+        lowest = y + piece.BOUNDS[orientation][1]
+
+        for table in (piece._CLOCKWISE, piece._ANTICLOCKWISE):
+            rotation = table[orientation][y][x]
+            if rotation:
+                lowest = max(lowest, rotation[1] + piece.BOUNDS[rotation[0]][1])
+
+        return lowest + 1
+
+    def land(state: State, actions: Tuple[Action, ...]) -> None:
+        nonlocal deepest
+
+        orientation, y, x = state
+        cells = tuple((y + dy, x + dx) for dy, dx in piece.CELLS[orientation])
+        key = frozenset(cells)
+        deepest = max(deepest, y + piece.BOUNDS[orientation][1] + 1)
+
+        if key not in placements:
+            placements[key] = Placement(orientation, y, x, cells, actions)
+
+    seen = {start}
+    queue: deque[Tuple[State, Tuple[Action, ...]]] = deque([(start, ())])
+
+    while queue:
+        state, actions = queue.popleft()
+        deepest = max(deepest, bottom(state))
+
+        land(_drop(piece, rows, state, heights), actions + (Action.HARD_DROP,))
+
+        for action in STEP_ACTIONS:
+            new_state, landed = _step(piece, rows, state, action)
+
+            if landed:
+                land(new_state, actions + (action,))
+            elif new_state not in seen:
+                seen.add(new_state)
+                queue.append((new_state, actions + (action,)))
+
+    return (
+        tuple(sorted(placements.values(), key=lambda p: len(p.actions))),
+        min(deepest + 1, len(rows)),
+    )
+
+
+def find_placements(
+    piece: Type[Piece], rows: Tuple[int, ...], start: State
+) -> Tuple[Placement, ...]:
+    """Finds every position the piece can come to rest in with a breadth-first search
+       over (orientation, y, x) states, or looks them up in PLACEMENT_CACHE.
+
+    Placements which cover the same cells (e.g. the two horizontal orientations of an
+    I piece) are only returned once, with the shortest action sequence found.
+
+    Args:
+        piece (Type[Piece]): The type of piece to place.
+        rows (Tuple[int, ...]): The board as row bitmasks, without the piece.
+        start (State): The (orientation, y, x) the piece starts from.
+
+    Returns:
+        Tuple[Placement, ...]: The unique placements, in order of the number of actions needed.
+    """
+
+    placements = PLACEMENT_CACHE.get(piece, rows, start)
+
+    if placements is None:
+        placements, length = _search_placements(piece, rows, start)
+        PLACEMENT_CACHE.put(piece, rows, start, placements, length)
+
+    return placements
+
+
+def column_heights(rows: Sequence[int]) -> list[int]:
+    """Gets the height of the stack in each column from the row bitmasks.
+
+    Args:
+        rows (Sequence[int]): The board as row bitmasks.
+
+    Returns:
+        list[int]: The height of the highest filled cell in each column, or 0 if empty.
+    """
+
+    heights = [0] * BOARD_WIDTH
+    seen = 0
+
+    for y, row in enumerate(rows):
+        new = row & ~seen
+
+        while new:
+            x = (new & -new).bit_length() - 1
+            new &= new - 1
+            heights[x] = BOARD_HEIGHT - y
+
+        seen |= row
+        if seen == FULL_ROW:
+            break
+
+    return heights
+
+
+@lru_cache(maxsize=4096)
+def find_drops(
+    piece: Type[Piece], rows: Tuple[int, ...]
+) -> Tuple[Tuple[Cell, ...], ...]:
+    """Finds where the piece lands when dropped straight down in each orientation and
+    column, ignoring whether it could get there from its spawn point in time.
+
+    This is much cheaper than find_placements(), so is suited to looking ahead.
+
+    Args:
+        piece (Type[Piece]): The type of piece to drop.
+        rows (Tuple[int, ...]): The board as row bitmasks, without the piece.
+
+    Returns:
+        Tuple[Tuple[Cell, ...], ...]: The cells of each distinct landing position.
+    """
+
+    heights = column_heights(rows)
+    drops: dict[frozenset[Cell], Tuple[Cell, ...]] = {}
+
+    for orientation, cells in enumerate(piece.CELLS):
+        min_dy, _, min_dx, max_dx = piece.BOUNDS[orientation]
+        columns = piece._DROPS[orientation]
+
+        for x in range(-min_dx, BOARD_WIDTH - max_dx):
+            y = min(floor - heights[column] for column, floor in columns[x])
+
+            if y + min_dy >= 0:
+                landed = tuple((y + dy, x + dx) for dy, dx in cells)
+                drops.setdefault(frozenset(landed), landed)
+
+    return tuple(drops.values())
+
+
+def enumerate_placements(board: Board) -> list[Placement]:
+    """Finds every position the board's current piece can come to rest in.
+
+    Args:
+        board (Board): The Tetris board.
+
+    Returns:
+        list[Placement]: The unique placements, in order of the number of actions needed.
+    """
+
+    piece = board.piece
+    if not piece or piece.landed:
+        return []
+
+    return list(
+        find_placements(
+            type(piece), board_rows(board), (piece.orientation, piece.y, piece.x)
+        )
+    )
+
+
+def spawn_state(piece: Type[Piece]) -> State:
+    """Gets the (orientation, y, x) a piece of the given type spawns in.
+
+    Args:
+        piece (Type[Piece]): The type of piece.
+
+    Returns:
+        State: The spawn state.
+    """
+
+    spawned = piece()
+
+    return spawned.orientation, spawned.y, spawned.x
+
+
+def place(
+    rows: Tuple[int, ...], cells: Tuple[Cell, ...]
+) -> Tuple[Tuple[int, ...], int]:
+    """Locks a piece's cells into the board and clears any full lines.
+
+    Args:
+        rows (Tuple[int, ...]): The board as row bitmasks.
+        cells (Tuple[Cell, ...]): The cells of the placed piece.
+
+    Returns:
+        Tuple[Tuple[int, ...], int]: The new row bitmasks and the number of lines cleared.
+    """
+
+    new_rows = list(rows)
+    for y, x in cells:
+        new_rows[y] |= 1 << x
+
+    kept = [row for row in new_rows if row != FULL_ROW]
+    cleared = len(new_rows) - len(kept)
+
+    return (0,) * cleared + tuple(kept), cleared
+
+
+def can_spawn(piece: Type[Piece], rows: Tuple[int, ...]) -> Optional[State]:
+    """Checks whether a piece of the given type can spawn on the board.
+
+    Args:
+        piece (Type[Piece]): The type of piece.
+        rows (Tuple[int, ...]): The board as row bitmasks.
+
+    Returns:
+        Optional[State]: The spawn state if the piece fits else None.
+    """
+
+    state = spawn_state(piece)
+    orientation, y, x = state
+    cells = tuple((y + dy, x + dx) for dy, dx in piece.CELLS[orientation])
+
+    return state if _is_free(rows, cells) else None
+
+
+_placement_cache_path = os.environ.get(PLACEMENT_CACHE_ENVIRONMENT_VARIABLE)
+
+PLACEMENT_CACHE = PlacementCache(
+    PERSISTENT_PLACEMENT_CACHE_SIZE if _placement_cache_path else PLACEMENT_CACHE_SIZE
+)
+
+if _placement_cache_path:
+    if os.path.exists(_placement_cache_path):
+        PLACEMENT_CACHE.load(_placement_cache_path)
+
+    atexit.register(PLACEMENT_CACHE.save, _placement_cache_path)
@@ -0,0 +1,110 @@
+import time
+from typing import Callable, NamedTuple, Sequence, Union
+
+from tetris.agent import BaseAgent
+from tetris.board import Action, Board
+from tetris.constants import MOVE_TIME
+from tetris.game import piece_sequence
+from tetris.pieces import PIECES
+
+# A synchronous agent: given the board, returns the action(s) to perform
+AgentCallback = Callable[[Board], Union[Action, Sequence[Action]]]
+
+
+class SimResult(NamedTuple):
+    """The outcome of a simulated game."""
+
+    seed: int
+    score: int
+    lines: int
+    pieces: int
+    seconds: float
+
+
+def sync_agent(agent: BaseAgent, move_time: float = MOVE_TIME) -> AgentCallback:
+    """Wraps an agent so that its moves can be made without an event loop.
+
+    The coroutine is stepped directly, so this only works for agents which do not
+    wait on anything (which is the case for any agent that just computes a move).
+
+    Args:
+        agent (BaseAgent): The agent to wrap.
+        move_time (float, optional): The time budget for each move, in seconds. Defaults to MOVE_TIME.
+
+    Returns:
+        AgentCallback: A function returning the agent's move for a board.
+    """
+
+    def play_move(board: Board) -> Union[Action, Sequence[Action]]:
+        coroutine = agent.play_move_with_deadline(
+            board, time.perf_counter() + move_time
+        )
+
+        try:
+            coroutine.send(None)
+        except StopIteration as result:
+            return result.value
+
+        coroutine.close()
+        raise RuntimeError("Agent awaited something while being simulated.")
+
+    return play_move
+
+
+def simulate(agent: Union[AgentCallback, BaseAgent], seed: int = -1) -> SimResult:
+    """Plays a full game without yielding any of the intermediate changes.
+
+    The rules are the same as Game.run(), so a seeded game scores the same in both.
+
+    Args:
+        agent (Union[AgentCallback, BaseAgent]): The agent, or a synchronous function returning its moves.
+        seed (int, optional): The seed of the game, or -1 for a random game. Defaults to -1.
+
+    Returns:
+        SimResult: The final score, lines cleared, pieces placed and wall time of the game.
+    """
+
+    if isinstance(agent, BaseAgent):
+        agent.setup()
+
+        try:
+            return simulate(sync_agent(agent), seed)
+        finally:
+            agent.teardown()
+
+    play_move = agent
+    start = time.perf_counter()
+    board = Board()
+    score = lines = pieces = 0
+
+    for index in piece_sequence(seed):
+        piece = PIECES[index]()
+        board.set_piece(piece)
+        if not board.spawn_piece():
+            break
+
+        while not piece.landed:
+            actions = play_move(board)
+            if isinstance(actions, Action):
+                actions = [actions]
+
+            if not actions:
+                board.apply_action(Action.NOOP)
+
+            for action in actions:
+                board.apply_action(action)
+
+                if piece.landed:
+                    break
+
+        pieces += 1
+
+        lines_to_clear = board.find_lines_to_clear()
+        if lines_to_clear:
+            score += board.clear_lines(lines_to_clear)
+            lines += len(lines_to_clear)
+
+        if not board.is_game_running():
+            break
+
+    return SimResult(seed, score, lines, pieces, time.perf_counter() - start)
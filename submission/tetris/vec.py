@@ -0,0 +1,328 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from tetris.board import Action, Board
+from tetris.constants import BOARD_HEIGHT, BOARD_WIDTH, LINE_CLEAR_SCORES
+from tetris.game import GAME_LENGTH, piece_sequence
+from tetris.pieces import PIECES
+
+# Cells are stored as 0 if empty, otherwise 1 + the index into PIECES of the piece type
+PIECE_TYPES: Tuple[str, ...] = tuple(piece.piece_type for piece in PIECES)
+
+# Score for clearing 0-4 lines at once
+SCORES = np.array([0] + [LINE_CLEAR_SCORES[lines] for lines in range(1, 5)])
+
+ORIENTATIONS = 4
+
+
+def _geometry() -> Tuple[np.ndarray, ...]:
+    """Builds the piece tables used by the environment from the piece classes.
+
+    Returns:
+        Tuple[np.ndarray, ...]: The (dy, dx) offsets of each cell indexed by
+        [piece, orientation, cell], the clockwise and anticlockwise rotation results
+        indexed by [piece, orientation, y, x] as (orientation, y, x) (or -1 if the
+        piece cannot rotate there), and the spawn (y, x) of each piece.
+    """
+
+    offsets = np.zeros((len(PIECES), ORIENTATIONS, 4, 2), dtype=np.int64)
+    rotations = np.full(
+        (2, len(PIECES), ORIENTATIONS, BOARD_HEIGHT, BOARD_WIDTH, 3), -1, np.int64
+    )
+    spawns = np.zeros((len(PIECES), 2), dtype=np.int64)
+
+    for index, piece in enumerate(PIECES):
+        for orientation in range(ORIENTATIONS):
+            # Pieces with fewer orientations never reach the padded ones
+            offsets[index, orientation] = piece.CELLS[orientation % len(piece.CELLS)]
+
+        for orientation in range(len(piece.CELLS)):
+            for y in range(BOARD_HEIGHT):
+                for x in range(BOARD_WIDTH):
+                    for direction, clockwise in enumerate((True, False)):
+                        rotated = piece.rotated(orientation, y, x, clockwise)
+                        if rotated:
+                            rotations[direction, index, orientation, y, x] = rotated
+
+        spawned = piece()
+        spawns[index] = spawned.y, spawned.x
+
+    return offsets, rotations, spawns
+
+
+OFFSETS, ROTATIONS, SPAWNS = _geometry()
+
+
+class VecTetrisEnv:
+    """Runs a batch of Tetris games in lockstep, one action per game per step.
+
+    The settled cells of every game are held in a (N, 21, 10) uint8 array, with the
+    current pieces kept separately as arrays of piece index, orientation, y and x.
+    Each step follows the rules of Board.apply_action() (the action then a fall) and
+    Game.run() (locking, line clears, scoring and spawning from the seeded piece
+    sequence), so a seeded game plays out exactly as it would in a Game.
+
+    Finished games are left as they are and ignore any further actions.
+    """
+
+    seeds: np.ndarray
+    boards: np.ndarray
+    pieces: np.ndarray
+    orientations: np.ndarray
+    ys: np.ndarray
+    xs: np.ndarray
+    scores: np.ndarray
+    lines: np.ndarray
+    placed: np.ndarray
+    dones: np.ndarray
+
+    def __init__(self, seeds: Sequence[int]) -> None:
+        self.reset(seeds)
+
+    @property
+    def num_games(self) -> int:
+        return len(self.seeds)
+
+    def reset(self, seeds: Optional[Sequence[int]] = None) -> None:
+        """Starts a new game in every slot.
+
+        Args:
+            seeds (Optional[Sequence[int]], optional): The seed of each game (-1 for random). Defaults to the current seeds.
+        """
+
+        if seeds is not None:
+            self.seeds = np.array(seeds, dtype=np.int64)
+
+        n = self.num_games
+
+        self.boards = np.zeros((n, BOARD_HEIGHT, BOARD_WIDTH), dtype=np.uint8)
+        self._sequences = np.array(
+            [piece_sequence(seed) for seed in self.seeds.tolist()], dtype=np.int64
+        ).reshape(n, GAME_LENGTH)
+        self._next = np.zeros(n, dtype=np.int64)
+
+        self.pieces = np.zeros(n, dtype=np.int64)
+        self.orientations = np.zeros(n, dtype=np.int64)
+        self.ys = np.zeros(n, dtype=np.int64)
+        self.xs = np.zeros(n, dtype=np.int64)
+
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.lines = np.zeros(n, dtype=np.int64)
+        self.placed = np.zeros(n, dtype=np.int64)
+        self.dones = np.zeros(n, dtype=bool)
+
+        self._spawn(np.arange(n))
+
+    def _cells(
+        self,
+        pieces: np.ndarray,
+        orientations: np.ndarray,
+        ys: np.ndarray,
+        xs: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        offsets = OFFSETS[pieces, orientations]
+
+        return ys[:, None] + offsets[..., 0], xs[:, None] + offsets[..., 1]
+
+    def _collides(
+        self,
+        games: np.ndarray,
+        pieces: np.ndarray,
+        orientations: np.ndarray,
+        ys: np.ndarray,
+        xs: np.ndarray,
+    ) -> np.ndarray:
+        """Checks whether pieces would leave the board or overlap its settled cells.
+
+        Args:
+            games (np.ndarray): The index of each game being checked.
+            pieces (np.ndarray): The piece index for each game.
+            orientations (np.ndarray): The orientation for each game.
+            ys (np.ndarray): The y coordinate for each game.
+            xs (np.ndarray): The x coordinate for each game.
+
+        Returns:
+            np.ndarray: True for each game where the piece does not fit.
+        """
+
+        cell_ys, cell_xs = self._cells(pieces, orientations, ys, xs)
+        outside = (
+            (cell_ys < 0)
+            | (cell_ys >= BOARD_HEIGHT)
+            | (cell_xs < 0)
+            | (cell_xs >= BOARD_WIDTH)
+        )
+        filled = (
+            self.boards[
+                games[:, None],
+                cell_ys.clip(0, BOARD_HEIGHT - 1),
+                cell_xs.clip(0, BOARD_WIDTH - 1),
+            ]
+            != 0
+        )
+
+        return (outside | filled).any(axis=1)
+
+    def _spawn(self, games: np.ndarray) -> None:
+        """Deals the next piece in each game, ending any game that is out of pieces
+        or where the piece spawns inside the stack."""
+
+        finished = self._next[games] >= GAME_LENGTH
+        self.dones[games[finished]] = True
+        games = games[~finished]
+
+        pieces = self._sequences[games, self._next[games]]
+        self._next[games] += 1
+
+        self.pieces[games] = pieces
+        self.orientations[games] = 0
+        self.ys[games], self.xs[games] = SPAWNS[pieces].T
+
+        blocked = self._collides(
+            games, pieces, self.orientations[games], self.ys[games], self.xs[games]
+        )
+        self.dones[games[blocked]] = True
+
+    def _lock(self, games: np.ndarray) -> np.ndarray:
+        """Settles the current pieces, clears lines and spawns the next pieces.
+
+        Args:
+            games (np.ndarray): The games whose pieces have landed.
+
+        Returns:
+            np.ndarray: The score gained by each game.
+        """
+
+        pieces = self.pieces[games]
+        cell_ys, cell_xs = self._cells(
+            pieces, self.orientations[games], self.ys[games], self.xs[games]
+        )
+        self.boards[games[:, None], cell_ys, cell_xs] = pieces[:, None] + 1
+
+        boards = self.boards[games]
+        full = (boards != 0).all(axis=2)
+        cleared = full.sum(axis=1)
+
+        clearing = cleared > 0
+        if clearing.any():
+            # Move the full rows to the top (keeping the order of the rest) and empty them
+            order = np.argsort(~full[clearing], axis=1, kind="stable")
+            shifted = np.take_along_axis(boards[clearing], order[:, :, None], axis=1)
+            shifted[np.arange(BOARD_HEIGHT) < cleared[clearing][:, None]] = 0
+            self.boards[games[clearing]] = shifted
+
+        rewards = SCORES[cleared]
+        self.scores[games] += rewards
+        self.lines[games] += cleared
+        self.placed[games] += 1
+
+        # The game is over once the stack reaches the top visible row
+        over = (self.boards[games, 1] != 0).any(axis=1)
+        self.dones[games[over]] = True
+        self._spawn(games[~over])
+
+        return rewards
+
+    def step(self, actions: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Applies one action in every game that is still running.
+
+        Args:
+            actions (Sequence[int]): The Action for each game.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The score gained in each game,
+            whether each game's piece landed and whether each game has finished.
+        """
+
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards = np.zeros(self.num_games, dtype=np.int64)
+        landed = np.zeros(self.num_games, dtype=bool)
+
+        games = np.flatnonzero(~self.dones)
+        if not games.size:
+            return rewards, landed, self.dones.copy()
+
+        actions = actions[games]
+        pieces = self.pieces[games]
+        orientations = self.orientations[games]
+        ys = self.ys[games]
+        xs = self.xs[games]
+
+        # Moves
+        shifts = (actions == Action.MOVE_RIGHT).astype(np.int64) - (
+            actions == Action.MOVE_LEFT
+        )
+        moved = xs + shifts
+        moving = (shifts != 0) & ~self._collides(games, pieces, orientations, ys, moved)
+        xs = np.where(moving, moved, xs)
+
+        # Rotations
+        for direction, action in enumerate(
+            (Action.ROTATE_CLOCKWISE, Action.ROTATE_ANTICLOCKWISE)
+        ):
+            rotating = actions == action
+            if not rotating.any():
+                continue
+
+            rotated = ROTATIONS[direction, pieces, orientations, ys, xs]
+            rotating &= rotated[:, 0] >= 0
+            rotated = np.where(
+                rotating[:, None], rotated, np.stack((orientations, ys, xs), axis=1)
+            )
+            rotating &= ~self._collides(games, pieces, *rotated.T)
+            orientations, ys, xs = np.where(
+                rotating[:, None], rotated, np.stack((orientations, ys, xs), axis=1)
+            ).T
+
+        # Hard drops fall until they land, anything else falls a row if it can
+        dropping = actions == Action.HARD_DROP
+        can_fall = ~self._collides(games, pieces, orientations, ys + 1, xs)
+
+        while (falling := dropping & can_fall).any():
+            ys = ys + falling
+            can_fall = ~self._collides(games, pieces, orientations, ys + 1, xs)
+
+        ys = ys + (~dropping & can_fall)
+
+        self.orientations[games] = orientations
+        self.ys[games] = ys
+        self.xs[games] = xs
+
+        landing = games[dropping | ~can_fall]
+        landed[landing] = True
+        if landing.size:
+            rewards[landing] = self._lock(landing)
+
+        return rewards, landed, self.dones.copy()
+
+    def to_board(self, game: int) -> Board:
+        """Creates a Board with the same cells and current piece as one of the games.
+
+        Args:
+            game (int): The index of the game.
+
+        Returns:
+            Board: The converted board, including the current piece if the game is running.
+        """
+
+        board = Board()
+        board.board = [
+            [PIECE_TYPES[cell - 1] if cell else None for cell in row]
+            for row in self.boards[game].tolist()
+        ]
+
+        if not self.dones[game]:
+            piece = PIECES[self.pieces[game]]()
+            piece.orientation = int(self.orientations[game])
+            piece.y = int(self.ys[game])
+            piece.x = int(self.xs[game])
+
+            board.set_piece(piece)
+            for y, x in piece.cells():
+                board.board[y][x] = piece.piece_type
+
+        board.recompute_heights()
+        board.rehash()
+
+        return board
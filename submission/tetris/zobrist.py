@@ -0,0 +1,122 @@
+import random
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from tetris.constants import BOARD_HEIGHT, BOARD_WIDTH, BoardState
+
+# The values a filled cell can hold: each piece type, and X for a filled cell of
+# unknown type (see bitboard.FILLED_CELL)
+CELL_VALUES: Tuple[str, ...] = ("I", "J", "L", "O", "S", "T", "Z", "X")
+
+KeyTable = Tuple[Tuple[int, ...], ...]
+
+
+def _key_table(rng: random.Random) -> KeyTable:
+    return tuple(
+        tuple(rng.getrandbits(64) for _ in range(BOARD_WIDTH))
+        for _ in range(BOARD_HEIGHT)
+    )
+
+
+# Fixed seed so that hashes are the same in every process
+_rng = random.Random(0x7E7215)
+
+# A random 64-bit key for each value of each cell, indexed by [value][y][x]
+ZOBRIST_KEYS: Dict[str, KeyTable] = {value: _key_table(_rng) for value in CELL_VALUES}
+
+# A random 64-bit key for each cell being filled, regardless of its value
+SHAPE_KEYS: KeyTable = _key_table(_rng)
+
+# Both keys of each value of each cell packed into one integer, as
+# ZOBRIST_KEYS << 64 | SHAPE_KEYS, so that both hashes are updated with one XOR
+CELL_KEYS: Dict[str, KeyTable] = {
+    value: tuple(
+        tuple(key << 64 | shape_key for key, shape_key in zip(row, shape_row))
+        for row, shape_row in zip(keys, SHAPE_KEYS)
+    )
+    for value, keys in ZOBRIST_KEYS.items()
+}
+
+SHAPE_MASK: int = (1 << 64) - 1
+
+
+def board_hash(board: BoardState, rows: Optional[range] = None) -> int:
+    """Computes the packed Zobrist hashes of a board state from scratch.
+
+    Args:
+        board (BoardState): The board state.
+        rows (Optional[range], optional): Only hash these rows. Defaults to all rows.
+
+    Returns:
+        int: The hash including the type of piece in each cell, shifted left 64
+        bits, combined with the hash of only which cells are filled.
+    """
+
+    packed = 0
+
+    for y in rows if rows is not None else range(BOARD_HEIGHT):
+        for x, cell in enumerate(board[y]):
+            if cell:
+                packed ^= CELL_KEYS[cell][y][x]
+
+    return packed
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TranspositionTable(Generic[K, V]):
+    """A bounded cache of search results keyed by board hash, evicting the least
+    recently used entry once full."""
+
+    def __init__(self, maxsize: int = 1 << 16) -> None:
+        self.maxsize = maxsize
+        self.entries: OrderedDict[K, V] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.entries
+
+    def get(self, key: K) -> Optional[V]:
+        """Looks up a result, marking it as recently used.
+
+        Args:
+            key (K): The key, e.g. Board.zobrist or Board.shape_zobrist.
+
+        Returns:
+            Optional[V]: The stored result, or None if there isn't one.
+        """
+
+        value = self.entries.get(key)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """Stores a result, evicting the least recently used one if the table is full.
+
+        Args:
+            key (K): The key, e.g. Board.zobrist or Board.shape_zobrist.
+            value (V): The result to store.
+        """
+
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,67 @@
+"""Tests of BitBoard against Board, playing the same random moves on both."""
+
+import random
+
+import pytest
+
+from tetris.bitboard import FULL_ROW, ROWS, BitBoard
+from tetris.board import Action, Board
+from tetris.pieces import PIECES
+
+
+def shape(board: Board) -> list[list[bool]]:
+    return [[bool(cell) for cell in row] for row in board.board]
+
+
+@pytest.mark.parametrize("track_colours", [True, False])
+def test_plays_like_board(track_colours: bool):
+    for seed in range(10):
+        rng = random.Random(seed)
+        board, bitboard = Board(), BitBoard(track_colours)
+
+        for _ in range(200):
+            piece_type = rng.randrange(len(PIECES))
+            piece, bitpiece = PIECES[piece_type](), PIECES[piece_type]()
+            board.set_piece(piece)
+            bitboard.set_piece(bitpiece)
+
+            spawned = board.spawn_piece()
+            assert bitboard.spawn_piece() == spawned
+            if not spawned:
+                break
+
+            while not piece.landed:
+                action = Action(rng.choice([0, 1, 2, 3, 3, 4, 4, 5]))
+                board.apply_action(action)
+                bitboard.apply_action(action)
+
+                assert bitpiece.key() == piece.key()
+                assert bitpiece.landed == piece.landed
+                assert shape(bitboard.to_board()) == shape(board)
+                assert bitboard.shape_zobrist == board.shape_zobrist
+                if track_colours:
+                    assert bitboard.to_board_state() == board.board
+                    assert bitboard.zobrist == board.zobrist
+
+            assert bitboard.heights == board.heights
+
+            lines = board.find_lines_to_clear()
+            assert bitboard.find_lines_to_clear() == lines
+            assert bitboard.clear_lines(lines) == board.clear_lines(lines)
+            assert bitboard.is_game_running() == board.is_game_running()
+
+            if not board.is_game_running():
+                break
+
+
+def test_hard_drop_lands_on_rows_written_directly():
+    for piece in PIECES:
+        bitboard = BitBoard()
+        bitboard.set_piece(piece())
+        bitboard.spawn_piece()
+        bitboard.board[15] = ROWS[FULL_ROW]
+
+        bitboard.apply_action(Action.HARD_DROP)
+
+        assert bitboard.piece is not None and bitboard.piece.landed
+        assert max(y for y, _ in bitboard.piece.cells()) == 14
@@ -0,0 +1,71 @@
+"""Tests of Board moves on boards that were written to directly, without
+recomputing the column heights."""
+
+from tetris.board import Action, Board
+from tetris.constants import BOARD_HEIGHT, BOARD_WIDTH
+from tetris.pieces import PIECE_MAPPINGS
+
+
+def spawned(piece_type: str) -> Board:
+    board = Board()
+    board.set_piece(PIECE_MAPPINGS[piece_type]())
+    board.spawn_piece()
+
+    return board
+
+
+def test_hard_drop_lands_on_rows_written_directly():
+    for piece_type in PIECE_MAPPINGS:
+        board = spawned(piece_type)
+        board.board[15] = ["G"] * BOARD_WIDTH
+
+        board.apply_action(Action.HARD_DROP)
+
+        assert board.piece is not None and board.piece.landed
+        assert max(y for y, _ in board.piece.cells()) == 14
+        assert board.board[15] == ["G"] * BOARD_WIDTH
+        assert min(board.heights) == BOARD_HEIGHT - 15
+
+
+def test_hard_drop_falls_through_rows_cleared_directly():
+    for piece_type in PIECE_MAPPINGS:
+        board = spawned(piece_type)
+        board.board[15] = ["G"] * BOARD_WIDTH
+        board.recompute_heights()
+
+        board.board[15] = [None] * BOARD_WIDTH
+        board.apply_action(Action.HARD_DROP)
+
+        assert board.piece is not None and board.piece.landed
+        assert max(y for y, _ in board.piece.cells()) == BOARD_HEIGHT - 1
+
+
+def test_fall_stops_on_cells_written_directly():
+    for piece_type in PIECE_MAPPINGS:
+        board = spawned(piece_type)
+        assert board.piece is not None
+
+        below = max(y for y, _ in board.piece.cells()) + 1
+        board.board[below] = ["G"] * BOARD_WIDTH
+
+        board.fall()
+
+        assert board.piece.landed
+        assert board.board[below] == ["G"] * BOARD_WIDTH
+
+
+def test_fall_continues_through_cells_cleared_directly():
+    for piece_type in PIECE_MAPPINGS:
+        board = spawned(piece_type)
+        assert board.piece is not None
+
+        below = max(y for y, _ in board.piece.cells()) + 1
+        board.board[below] = ["G"] * BOARD_WIDTH
+        board.recompute_heights()
+
+        board.board[below] = [None] * BOARD_WIDTH
+        y = board.piece.y
+        board.fall()
+
+        assert not board.piece.landed
+        assert board.piece.y == y + 1
@@ -0,0 +1,105 @@
+"""Tests of Piece.drop_distance() against stepping the piece down with fall() until
+has_landed() is true.
+
+Each piece is placed at every position where it lies within the board, over every
+combination of stack heights in its columns where each column is either empty or
+stacked to within a row of the piece's lowest cell in that column. This covers
+the piece landing on each column, and being tucked under each column. The other
+columns get random heights, which drop_distance() should ignore.
+"""
+
+import itertools
+import random
+from typing import Sequence, Tuple, Type
+
+import pytest
+
+from tetris.constants import BOARD_HEIGHT, BOARD_WIDTH, BoardState
+from tetris.piece import Piece
+from tetris.pieces import PIECE_MAPPINGS
+
+# The gaps between the piece and the top of the stack tried in each of its columns,
+# where -1 is a stack reaching the piece's lowest cell in that column
+GAPS = range(-1, 2)
+
+
+def make_board(heights: Sequence[int]) -> BoardState:
+    return [
+        ["G" if BOARD_HEIGHT - y <= height else None for height in heights]
+        for y in range(BOARD_HEIGHT)
+    ]
+
+
+def profiles(
+    piece: Type[Piece], orientation: int, y: int, x: int
+) -> list[Tuple[int, ...]]:
+    """Gets the heights to try in each of the piece's columns, from left to right."""
+
+    options = []
+    for dy, dx in piece.BOTTOMS[orientation]:
+        heights = {0}
+
+        for gap in GAPS:
+            top = y + dy + 1 + gap
+            if 0 <= top < BOARD_HEIGHT:
+                heights.add(BOARD_HEIGHT - top)
+
+        options.append(sorted(heights))
+
+    return list(itertools.product(*options))
+
+
+def steps_to_land(piece: Piece, board: BoardState) -> int:
+    steps = 0
+    while not piece.has_landed(board):
+        piece.fall()
+        steps += 1
+
+    return steps
+
+
+CASES = [
+    (piece_type, orientation)
+    for piece_type, piece in sorted(PIECE_MAPPINGS.items())
+    for orientation in range(len(piece.CELLS))
+]
+
+
+@pytest.mark.parametrize("piece_type, orientation", CASES)
+def test_matches_falling_until_landed(piece_type: str, orientation: int):
+    piece = PIECE_MAPPINGS[piece_type]
+    rng = random.Random(f"{piece_type} {orientation}")
+
+    for y, x in itertools.product(range(BOARD_HEIGHT), range(BOARD_WIDTH)):
+        if not piece.fits(orientation, y, x):
+            continue
+
+        columns = [(x + dx, y + dy) for dy, dx in piece.BOTTOMS[orientation]]
+
+        for profile in profiles(piece, orientation, y, x):
+            heights = [rng.randint(0, BOARD_HEIGHT) for _ in range(BOARD_WIDTH)]
+            for (column, _), height in zip(columns, profile):
+                heights[column] = height
+
+            distance = piece.drop_distance(orientation, y, x, heights)
+
+            # The stack reaches up to or past the piece's lowest cell in a column
+            tucked = any(BOARD_HEIGHT - heights[c] <= bottom for c, bottom in columns)
+            if tucked:
+                assert distance is None, (y, x, profile)
+                continue
+
+            instance = piece()
+            instance.orientation, instance.y, instance.x = orientation, y, x
+            board = make_board(heights)
+
+            assert distance == steps_to_land(instance, board), (y, x, profile)
+
+
+@pytest.mark.parametrize("piece_type, orientation", CASES)
+def test_none_where_the_piece_does_not_fit(piece_type: str, orientation: int):
+    piece = PIECE_MAPPINGS[piece_type]
+
+    for x in range(BOARD_WIDTH):
+        if not any(piece.fits(orientation, y, x) for y in range(BOARD_HEIGHT)):
+            assert piece.drop_distance(orientation, 0, x, [0] * BOARD_WIDTH) is None
@@ -0,0 +1,241 @@
+"""Differential tests of the table-driven piece moves against the moves of the
+original per-piece implementation.
+
+data/piece_moves.json was recorded from the hand-written move methods of each
+piece, before they were replaced by the tables built in Piece.__init_subclass__.
+Each piece was placed at every position where it lies within the board, with only
+its own cells filled, and each operation was run. For every (piece, orientation,
+operation), "default" holds the result at most positions and "exceptions" holds
+the positions whose result differs. Cells and states are relative to the piece's
+position:
+
+- moves and rotations: [vacated cells, occupied cells, [orientation, dy, dx],
+  blocking cells], [null] if the piece cannot move on an empty board, or
+  "offboard" if the old code moved cells off the board
+- has_landed: [true], or [false, blocking cells]
+- fall: [vacated cells, occupied cells, [orientation, dy, dx]], recorded only where
+  the piece has not landed
+
+The blocking cells are the cells within four of the piece's position that stop
+the move (or make the piece land) when filled; a default's blocking cells are
+clipped to the board.
+"""
+
+import json
+import os
+from typing import Any, Iterator, Optional, Tuple, Type
+
+import pytest
+
+from tetris.constants import BOARD_HEIGHT, BOARD_WIDTH, BoardState, Cell
+from tetris.piece import Piece
+from tetris.pieces import PIECE_MAPPINGS
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+OPERATIONS = (
+    "move_left",
+    "move_right",
+    "rotate_clockwise",
+    "rotate_anticlockwise",
+    "has_landed",
+    "fall",
+)
+
+# The distance from the piece's position within which blocking cells were recorded
+REACH = 4
+
+with open(os.path.join(DATA_PATH, "piece_moves.json")) as f:
+    RECORDED: dict[str, dict[str, Any]] = json.load(f)
+
+
+def positions(piece: Type[Piece], orientation: int) -> Iterator[Tuple[int, int]]:
+    for y in range(BOARD_HEIGHT):
+        for x in range(BOARD_WIDTH):
+            if piece.fits(orientation, y, x):
+                yield y, x
+
+
+def expected(piece_type: str, orientation: int, operation: str, y: int, x: int) -> Any:
+    """Gets the recorded result of an operation, with the blocking cells of a default
+    result clipped to the board."""
+
+    recorded = RECORDED[f"{piece_type} {orientation} {operation}"]
+
+    exception = recorded["exceptions"].get(f"{y} {x}")
+    if exception is not None:
+        return exception
+
+    default = recorded["default"]
+    if operation == "fall" or default == [None] or default == [True]:
+        return default
+
+    blockers = [
+        [dy, dx]
+        for dy, dx in default[-1]
+        if 0 <= y + dy < BOARD_HEIGHT and 0 <= x + dx < BOARD_WIDTH
+    ]
+
+    return default[:-1] + [blockers]
+
+
+def make_piece(piece: Type[Piece], orientation: int, y: int, x: int) -> Piece:
+    instance = piece()
+    instance.orientation, instance.y, instance.x = orientation, y, x
+
+    return instance
+
+
+def make_board(piece: Piece, filled: list[Cell] = []) -> BoardState:
+    board: BoardState = [[None] * BOARD_WIDTH for _ in range(BOARD_HEIGHT)]
+
+    for y, x in piece.cells():
+        board[y][x] = piece.piece_type
+    for y, x in filled:
+        board[y][x] = "G"
+
+    return board
+
+
+def run(
+    piece: Type[Piece], orientation: int, y: int, x: int, operation: str, filled=[]
+) -> Tuple[Any, Tuple[int, int, int]]:
+    """Runs an operation on a piece with only its own cells (and any filled cells) on
+    the board, returning the result and the piece's (orientation, y, x) afterwards."""
+
+    instance = make_piece(piece, orientation, y, x)
+    board = make_board(instance, filled)
+
+    if operation == "fall":
+        result = instance.fall()
+    else:
+        result = getattr(instance, operation)(board)
+
+    return result, (instance.orientation, instance.y, instance.x)
+
+
+def relative(cells: Optional[list[Cell]], y: int, x: int) -> Optional[list[list[int]]]:
+    if cells is None:
+        return None
+
+    return sorted([cy - y, cx - x] for cy, cx in cells)
+
+
+def blocked(result: Any) -> bool:
+    return result is True or (isinstance(result, tuple) and result[0] is None)
+
+
+def neighbourhood(piece: Piece) -> list[Cell]:
+    cells = set(piece.cells())
+
+    return [
+        (y, x)
+        for y in range(max(0, piece.y - REACH), min(BOARD_HEIGHT, piece.y + REACH + 1))
+        for x in range(max(0, piece.x - REACH), min(BOARD_WIDTH, piece.x + REACH + 1))
+        if (y, x) not in cells
+    ]
+
+
+def is_i_clockwise_fix(
+    piece_type: str, orientation: int, x: int, operation: str
+) -> bool:
+    """The old IPiece left one of the occupied cells out of its clockwise rotation
+    from orientation 1 at x == 1."""
+
+    return (
+        piece_type == "I"
+        and operation == "rotate_clockwise"
+        and orientation == 1
+        and x == 1
+    )
+
+
+CASES = [
+    (piece_type, orientation, operation)
+    for piece_type, piece in sorted(PIECE_MAPPINGS.items())
+    for orientation in range(len(piece.CELLS))
+    for operation in OPERATIONS
+]
+
+
+@pytest.mark.parametrize("piece_type, orientation, operation", CASES)
+def test_matches_recorded_moves(piece_type: str, orientation: int, operation: str):
+    piece = PIECE_MAPPINGS[piece_type]
+    recorded = RECORDED[f"{piece_type} {orientation} {operation}"]
+
+    # Every recorded exception is at a position the piece fits in
+    fitting = {f"{y} {x}" for y, x in positions(piece, orientation)}
+    assert set(recorded["exceptions"]) <= fitting
+
+    for y, x in positions(piece, orientation):
+        if operation == "fall" and run(piece, orientation, y, x, "has_landed")[0]:
+            continue
+
+        want = expected(piece_type, orientation, operation, y, x)
+        result, state = run(piece, orientation, y, x, operation)
+
+        if want == "offboard":
+            # Rotations at the top of the board are kicked down instead of leaving it
+            assert operation.startswith("rotate") and y <= 1
+            if not blocked(result):
+                assert all(
+                    0 <= cy < BOARD_HEIGHT and 0 <= cx < BOARD_WIDTH
+                    for cy, cx in result[1]
+                )
+            continue
+
+        if operation == "has_landed":
+            assert [result] == want[:1], (y, x)
+            if result:
+                continue
+        elif want == [None]:
+            assert result == (None, None), (y, x)
+            assert state == (orientation, y, x)
+            continue
+        else:
+            old, new = result
+            moved = [state[0], state[1] - y, state[2] - x]
+
+            assert relative(old, y, x) == want[0], (y, x)
+            assert moved == want[2], (y, x)
+
+            if is_i_clockwise_fix(piece_type, orientation, x, operation):
+                # Every cell the rotated piece covers is now occupied
+                after = make_piece(piece, *state).cells()
+                before = make_piece(piece, orientation, y, x).cells()
+                assert sorted(new) == sorted(c for c in after if c not in before)
+                assert set(map(tuple, want[1])) < {(cy - y, cx - x) for cy, cx in new}
+            else:
+                assert relative(new, y, x) == want[1], (y, x)
+
+        if operation == "fall":
+            continue
+
+        # Each recorded blocking cell stops the move on its own, and filling every
+        # other cell nearby does not
+        blockers = {(y + dy, x + dx) for dy, dx in want[-1]}
+        instance = make_piece(piece, orientation, y, x)
+
+        for cell in blockers:
+            assert blocked(run(piece, orientation, y, x, operation, [cell])[0]), (
+                y,
+                x,
+                cell,
+            )
+
+        others = [cell for cell in neighbourhood(instance) if cell not in blockers]
+        assert not blocked(run(piece, orientation, y, x, operation, others)[0]), (
+            y,
+            x,
+        )
+
+
+def test_rotations_at_the_top_stay_on_the_board():
+    for piece_type, piece in PIECE_MAPPINGS.items():
+        for orientation in range(len(piece.CELLS)):
+            for y, x in positions(piece, orientation):
+                for operation in ("rotate_clockwise", "rotate_anticlockwise"):
+                    result, state = run(piece, orientation, y, x, operation)
+
+                    if not blocked(result):
+                        assert piece.fits(*state)